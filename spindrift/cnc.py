@@ -7,14 +7,82 @@ It can handle updates from both mock servers and real CNC machines.
 """
 
 import re
+import sys
+import logging
 import math
 import time
+from array import array
 from datetime import datetime
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any
+from typing import (
+    Optional,
+    Dict,
+    Any,
+    Callable,
+    ClassVar,
+    Iterable,
+    List,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 from enum import Enum
 
 
+logger = logging.getLogger(__name__)
+
+# dataclass(slots=True) needs Python 3.10+; older versions keep __dict__ instances
+_DATACLASS_OPTIONS: Dict[str, Any] = (
+    {"slots": True} if sys.version_info >= (3, 10) else {}
+)
+
+# Framing for status (<...>), diagnose ({...}) and state ([...]) responses.
+# Surrounding whitespace is matched here so callers need not strip() first.
+_STATUS_RE = re.compile(r"\s*<([^|]*)(.*)>\s*", re.S)
+_DIAGNOSE_RE = re.compile(r"\s*\{(.*)\}\s*", re.S)
+_STATE_RE = re.compile(r"\s*\[(.*)\]\s*", re.S)
+
+# Work coordinate systems reported in $G state responses
+_WCS_CODES = frozenset(("G54", "G55", "G56", "G57", "G58", "G59"))
+
+# One KEY:VALUE segment; a segment without ':' is skipped like before
+_FIELD_RE = re.compile(r"(?:^|\|)([^|:]*):([^|]*)")
+
+# Defaults for missing trailing values, one entry per field position
+_AXIS_PADDING = (0.0,) * 5
+_FEED_DEFAULTS = (0.0, 0.0, 100)
+_SPINDLE_DEFAULTS = (0.0, 0.0, 100, 0, 0.0, 0.0)
+_TOOL_DEFAULTS = (-1, 0.0, -1)
+_LASER_DEFAULTS = (0, 0, 0, 0.0, 100.0)
+_PLAYBACK_DEFAULTS = (-1, 0, 0)
+_DIAGNOSE_PADDING = (0,) * 6
+
+# Most distinct unknown field keys remembered (and logged) per CNC, so a
+# device sending garbage keys cannot grow the sets without bound
+_MAX_UNKNOWN_FIELDS = 64
+
+
+def _decode_response(response: bytes) -> str:
+    """Decode a raw response from the transport (protocol text is ASCII)."""
+    # latin-1 maps every byte 1:1, so it never raises and needs no validation
+    return response.decode("latin-1")
+
+
+def _pad_fields(parts: List[Any], defaults: Tuple[Any, ...]) -> List[Any]:
+    """Pad or trim a split value list in place to exactly len(defaults) items."""
+    parts.extend(defaults[len(parts) :])
+    del parts[len(defaults) :]
+    return parts
+
+
+def _parse_axes(value: str) -> List[float]:
+    """Parse an MPos/WPos value into exactly five floats, mapping nan to 0.0."""
+    return _pad_fields(
+        [float(x) if x != "nan" else 0.0 for x in value.split(",")], _AXIS_PADDING
+    )
+
+
 class CNCState(Enum):
     """CNC machine states"""
 
@@ -32,7 +100,11 @@ class CNCState(Enum):
     NOT_CONNECTED = "N/A"
 
 
-@dataclass
+# Wire value -> CNCState, avoids Enum.__call__ on every status packet
+_STATE_BY_VALUE: Dict[str, CNCState] = {state.value: state for state in CNCState}
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class Position:
     """Represents a position in 3D space with optional rotary axis"""
 
@@ -45,8 +117,42 @@ class Position:
     def __str__(self):
         return f"X:{self.x:.4f} Y:{self.y:.4f} Z:{self.z:.4f} A:{self.a:.4f} B:{self.b:.4f}"
 
+    # Batch helpers for position histories. A packed buffer is one contiguous
+    # array("d") of x, y, z, a, b values per position, rather than a list of
+    # objects each holding five boxed floats.
+
+    @classmethod
+    def pack(cls, positions: Iterable["Position"]) -> array:
+        """Pack positions into a contiguous array("d") of x, y, z, a, b values."""
+        buffer = array("d")
+        for position in positions:
+            buffer.extend((position.x, position.y, position.z, position.a, position.b))
+        return buffer
+
+    @classmethod
+    def unpack(cls, buffer: Sequence[float]) -> List["Position"]:
+        """Rebuild positions from a packed buffer, ignoring a partial trailing entry."""
+        return [cls(*buffer[i : i + 5]) for i in range(0, len(buffer) - 4, 5)]
+
+    @staticmethod
+    def rotate_packed(buffer: array, angle: float) -> None:
+        """
+        Rotate every packed position's X/Y about the origin, in place.
 
-@dataclass
+        Args:
+            buffer: Packed array("d") as returned by Position.pack
+            angle: Rotation in degrees (same convention as the status R field)
+        """
+        radians = math.radians(angle)
+        cos_r = math.cos(radians)
+        sin_r = math.sin(radians)
+        xs = buffer[0::5]
+        ys = buffer[1::5]
+        buffer[0::5] = array("d", [cos_r * x - sin_r * y for x, y in zip(xs, ys)])
+        buffer[1::5] = array("d", [sin_r * x + cos_r * y for x, y in zip(xs, ys)])
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class FeedInfo:
     """Feed rate information"""
 
@@ -58,7 +164,7 @@ class FeedInfo:
         return f"Current:{self.current:.1f} Target:{self.target:.1f} Override:{self.override}%"
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class SpindleInfo:
     """Spindle information"""
 
@@ -73,7 +179,7 @@ class SpindleInfo:
         return f"RPM:{self.current_rpm:.1f}/{self.target_rpm:.1f} Temp:{self.temperature:.1f}°C"
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ToolInfo:
     """Tool information"""
 
@@ -85,7 +191,7 @@ class ToolInfo:
         return f"Tool:{self.current_tool} TLO:{self.tool_length_offset:.4f} Target:{self.target_tool}"
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class LaserInfo:
     """Laser information"""
 
@@ -99,7 +205,7 @@ class LaserInfo:
         return f"Mode:{self.mode} State:{self.state} Power:{self.power:.1f}% Scale:{self.scale:.1f}%"
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class WorkCoordinateSystem:
     """Work coordinate system information"""
 
@@ -112,7 +218,7 @@ class WorkCoordinateSystem:
     g59: Position = field(default_factory=Position)
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class SwitchStates:
     """Switch states from diagnose command"""
 
@@ -129,7 +235,7 @@ class SwitchStates:
         return f"Spindle:{self.spindle} Fan:{self.spindle_fan} Vacuum:{self.vacuum} Light:{self.light}"
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class SwitchLevels:
     """Switch level values from diagnose command"""
 
@@ -142,7 +248,7 @@ class SwitchLevels:
         return f"Spindle:{self.spindle} Fan:{self.spindle_fan} Vacuum:{self.vacuum} Laser:{self.laser}"
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class SensorStates:
     """Sensor states from diagnose command"""
 
@@ -169,6 +275,98 @@ class SensorStates:
         return f"Endstops(X:{self.x_min}/{self.x_max} Y:{self.y_min}/{self.y_max} Z:{self.z_max}) Probe:{self.probe} E-Stop:{self.e_stop}"
 
 
+# Groups exported by CNC.get_status_dict: (attribute name, exported fields)
+_STATUS_DICT_GROUPS = (
+    ("machine_position", ("x", "y", "z", "a", "b")),
+    ("work_position", ("x", "y", "z", "a", "b")),
+    ("feed_info", ("current", "target", "override")),
+    ("spindle_info", ("current_rpm", "target_rpm", "override", "temperature")),
+    ("tool_info", ("current_tool", "tool_length_offset", "target_tool")),
+    ("laser_info", ("mode", "state", "power", "scale")),
+    (
+        "switches",
+        (
+            "spindle",
+            "spindle_fan",
+            "vacuum",
+            "light",
+            "tool_sensor_pwr",
+            "air",
+            "wp_charge_pwr",
+            "laser",
+        ),
+    ),
+    ("switch_levels", ("spindle", "spindle_fan", "vacuum", "laser")),
+    (
+        "sensors",
+        (
+            "x_min",
+            "x_max",
+            "y_min",
+            "y_max",
+            "z_max",
+            "cover",
+            "probe",
+            "calibrate",
+            "atc_home",
+            "tool_sensor",
+            "e_stop",
+        ),
+    ),
+)
+
+
+def _compile_status_exporters() -> Tuple[Callable[..., Any], Callable[..., Any]]:
+    """
+    Generate CNC.get_status_dict and CNC.get_status_flat from _STATUS_DICT_GROUPS.
+
+    The generated functions read every exported attribute by name with no
+    per-call loop, i.e. the same bytecode as a hand-unrolled version, while
+    the group table stays the single place the exported fields are listed.
+    """
+    bind_lines = []
+    nested_items = []
+    flat_items = []
+    for name, fields in _STATUS_DICT_GROUPS:
+        bind_lines.append(f"    {name} = self.{name}")
+        nested_items.append(
+            f"{name!r}: {{"
+            + ", ".join(f"{field_name!r}: {name}.{field_name}" for field_name in fields)
+            + "}"
+        )
+        flat_items.extend(
+            f"{name + '_' + field_name!r}: {name}.{field_name}"
+            for field_name in fields
+        )
+    bind = "\n".join(bind_lines)
+
+    source = f'''
+def get_status_dict(self) -> "Dict[str, Any]":
+    """Get current status as dictionary for serialization"""
+{bind}
+    return {{"state": self.state.value, {", ".join(nested_items)}}}
+
+
+def get_status_flat(self) -> "Dict[str, Any]":
+    """
+    Get current status as a single-level dictionary.
+
+    Carries the same values as get_status_dict, keyed as
+    "<group>_<field>" (e.g. "machine_position_x") in a fixed order,
+    which serializes faster than the nested form for telemetry.
+    """
+{bind}
+    return {{"state": self.state.value, {", ".join(flat_items)}}}
+'''
+    namespace: Dict[str, Any] = {"__name__": __name__}
+    exec(compile(source, "<spindrift.cnc status exporters>", "exec"), namespace)
+
+    exporters = namespace["get_status_dict"], namespace["get_status_flat"]
+    for exporter in exporters:
+        exporter.__qualname__ = f"CNC.{exporter.__name__}"
+    return exporters
+
+
 class CNC:
     """
     Core CNC class that tracks the state of the mill.
@@ -216,390 +414,406 @@ class CNC:
         self.played_seconds = 0
 
         # Time tracking
+        # Epoch time is tracked as an offset from time.monotonic() so wall
+        # clock adjustments on the host do not skew the CNC clock
         self._time_initialized: bool = False
-        self._initial_epoch_time: Optional[float] = None
-        self._system_time_at_init: Optional[float] = None
+        self._initial_epoch_time: float = 0.0
+        self._system_time_at_init: float = 0.0
 
         # Switch and sensor states (from diagnose command)
         self.switches = SwitchStates()
         self.switch_levels = SwitchLevels()
         self.sensors = SensorStates()
 
-    def parse_status_response(self, response: str) -> bool:
+        # Unknown field keys already reported, so each is only logged once
+        self._unknown_status_fields: Set[str] = set()
+        self._unknown_diagnose_fields: Set[str] = set()
+
+    def parse_status_response(self, response: Union[str, bytes]) -> bool:
         """
         Parse status response from CNC machine (? command).
 
         Format: <Idle|MPos:-1.0000,-1.0000,-1.0000,0.0000,0.0000|WPos:287.6600,201.0800,78.1109,nan,0.0000|F:0.0,3000.0,100.0|S:0.0,12000.0,100.0,0,23.2,24.2|T:2,-7.208,-1|W:0.00|L:0, 0, 0, 0.0,100.0|C:2,1,0,1>
 
         Args:
-            response: Status response string from CNC machine
+            response: Status response from CNC machine, as str or raw bytes
 
         Returns:
             bool: True if parsing was successful, False otherwise
         """
+        if isinstance(response, bytes):
+            response = _decode_response(response)
         if not response or not isinstance(response, str):
             return False
 
-        # Strip whitespace and check format
-        response = response.strip()
-        if not response.startswith("<") or not response.endswith(">"):
+        match = _STATUS_RE.fullmatch(response)
+        if match is None:
             return False
 
-        try:
-            # Remove angle brackets
-            content = response[1:-1]
-
-            # Split by pipe character
-            parts = content.split("|")
-
-            # First part is the state
-            if parts:
-                state_str = parts[0]
-                try:
-                    self.state = CNCState(state_str)
-                except ValueError:
-                    # Unknown state, keep as string for now
-                    pass
-
-            # Parse remaining parts
-            for part in parts[1:]:
-                if ":" not in part:
-                    continue
-
-                key, value = part.split(":", 1)
-                self._parse_status_field(key, value)
-
-            return True
+        # First part is the state
+        state_str, fields = match.groups()
+        state = _STATE_BY_VALUE.get(state_str)
+        if state is not None:
+            self.state = state
+        # Unknown states leave the previous state in place
+
+        # Parse remaining KEY:VALUE parts, dispatching inline so each
+        # field costs one dict lookup and one handler call
+        handlers = self._STATUS_HANDLERS
+        for key, value in _FIELD_RE.findall(fields):
+            handler = handlers.get(key)
+            if handler is None:
+                seen = self._unknown_status_fields
+                if key not in seen and len(seen) < _MAX_UNKNOWN_FIELDS:
+                    seen.add(key)
+                    logger.debug("Ignoring unknown status field %r", key)
+                continue
+            try:
+                handler(self, value)
+            except (ValueError, IndexError, OverflowError):
+                # Skip malformed fields (OverflowError: int(float("inf")))
+                pass
 
-        except Exception as e:
-            # Log error in real implementation
-            return False
+        return True
 
-    def _parse_status_field(self, key: str, value: str):
-        """Parse individual field from status response"""
-        try:
-            if key == "MPos":
-                # Machine position
-                coords = [float(x) if x != "nan" else 0.0 for x in value.split(",")]
-                self.machine_position.x = coords[0] if len(coords) > 0 else 0.0
-                self.machine_position.y = coords[1] if len(coords) > 1 else 0.0
-                self.machine_position.z = coords[2] if len(coords) > 2 else 0.0
-                self.machine_position.a = coords[3] if len(coords) > 3 else 0.0
-                self.machine_position.b = coords[4] if len(coords) > 4 else 0.0
-
-            elif key == "WPos":
-                # Work position
-                coords = [float(x) if x != "nan" else 0.0 for x in value.split(",")]
-                self.work_position.x = coords[0] if len(coords) > 0 else 0.0
-                self.work_position.y = coords[1] if len(coords) > 1 else 0.0
-                self.work_position.z = coords[2] if len(coords) > 2 else 0.0
-                self.work_position.a = coords[3] if len(coords) > 3 else 0.0
-                self.work_position.b = coords[4] if len(coords) > 4 else 0.0
-
-                # Calculate work coordinate offset
-                self._calculate_wco()
-
-            elif key == "F":
-                # Feed information
-                feed_parts = value.split(",")
-                self.feed_info.current = (
-                    float(feed_parts[0]) if len(feed_parts) > 0 else 0.0
-                )
-                self.feed_info.target = (
-                    float(feed_parts[1]) if len(feed_parts) > 1 else 0.0
-                )
-                self.feed_info.override = (
-                    int(float(feed_parts[2])) if len(feed_parts) > 2 else 100
-                )
-
-            elif key == "S":
-                # Spindle information
-                spindle_parts = value.split(",")
-                self.spindle_info.current_rpm = (
-                    float(spindle_parts[0]) if len(spindle_parts) > 0 else 0.0
-                )
-                self.spindle_info.target_rpm = (
-                    float(spindle_parts[1]) if len(spindle_parts) > 1 else 0.0
-                )
-                self.spindle_info.override = (
-                    int(float(spindle_parts[2])) if len(spindle_parts) > 2 else 100
-                )
-                self.spindle_info.vacuum_mode = (
-                    int(spindle_parts[3]) if len(spindle_parts) > 3 else 0
-                )
-                self.spindle_info.temperature = (
-                    float(spindle_parts[4]) if len(spindle_parts) > 4 else 0.0
-                )
-                self.spindle_info.bed_temperature = (
-                    float(spindle_parts[5]) if len(spindle_parts) > 5 else 0.0
-                )
-
-            elif key == "T":
-                # Tool information
-                tool_parts = value.split(",")
-                self.tool_info.current_tool = (
-                    int(tool_parts[0]) if len(tool_parts) > 0 else -1
-                )
-                self.tool_info.tool_length_offset = (
-                    float(tool_parts[1]) if len(tool_parts) > 1 else 0.0
-                )
-                self.tool_info.target_tool = (
-                    int(tool_parts[2]) if len(tool_parts) > 2 else -1
-                )
-
-            elif key == "W":
-                # Workpiece voltage
-                self.workpiece_voltage = float(value)
-
-            elif key == "L":
-                # Laser information
-                laser_parts = value.split(",")
-                self.laser_info.mode = (
-                    int(laser_parts[0]) if len(laser_parts) > 0 else 0
-                )
-                self.laser_info.state = (
-                    int(laser_parts[1]) if len(laser_parts) > 1 else 0
-                )
-                self.laser_info.testing = (
-                    int(laser_parts[2]) if len(laser_parts) > 2 else 0
-                )
-                self.laser_info.power = (
-                    float(laser_parts[3]) if len(laser_parts) > 3 else 0.0
-                )
-                self.laser_info.scale = (
-                    float(laser_parts[4]) if len(laser_parts) > 4 else 100.0
-                )
-
-            elif key == "P":
-                # Playback information
-                play_parts = value.split(",")
-                self.played_lines = int(play_parts[0]) if len(play_parts) > 0 else -1
-                self.played_percent = int(play_parts[1]) if len(play_parts) > 1 else 0
-                self.played_seconds = int(play_parts[2]) if len(play_parts) > 2 else 0
-
-            elif key == "A":
-                # ATC state
-                self.atc_state = int(value)
-
-            elif key == "O":
-                # Max delta
-                self.max_delta = float(value)
-
-            elif key == "H":
-                # Halt reason
-                self.halt_reason = int(value)
-
-            elif key == "R":
-                # Rotation angle
-                self.rotation_angle = float(value)
-
-            elif key == "G":
-                # Active coordinate system
-                self.active_coord_system = int(value)
-
-            elif key == "C":
-                # Control states (multi-value field)
-                # This appears to be a comma-separated list of control state values
-                # For now, we'll store it as a string since the exact meaning isn't clear
-                self.control_states = value
-
-        except (ValueError, IndexError):
-            # Skip malformed fields
-            pass
-
-    def _calculate_wco(self):
-        """Calculate work coordinate offset from machine and work positions"""
-        # Basic calculation - may need adjustment based on rotation
-        self.work_coordinate_offset.x = round(
-            self.machine_position.x
-            - (
-                math.cos(math.radians(self.rotation_angle)) * self.work_position.x
-                - math.sin(math.radians(self.rotation_angle)) * self.work_position.y
-            ),
-            3,
-        )
-        self.work_coordinate_offset.y = round(
-            self.machine_position.y
-            - (
-                math.sin(math.radians(self.rotation_angle)) * self.work_position.x
-                + math.cos(math.radians(self.rotation_angle)) * self.work_position.y
-            ),
-            3,
+    def _parse_mpos(self, value: str):
+        """Machine position"""
+        mpos = self.machine_position
+        mpos.x, mpos.y, mpos.z, mpos.a, mpos.b = _parse_axes(value)
+
+    def _parse_wpos(self, value: str):
+        """Work position"""
+        wpos = self.work_position
+        wpos.x, wpos.y, wpos.z, wpos.a, wpos.b = _parse_axes(value)
+
+        # Calculate work coordinate offset
+        self._calculate_wco()
+
+    def _parse_feed(self, value: str):
+        """Feed information"""
+        current, target, override = _pad_fields(value.split(","), _FEED_DEFAULTS)
+        feed = self.feed_info
+        feed.current = float(current)
+        feed.target = float(target)
+        # Overrides arrive as "100.0"; int(float()) is two C calls and beats
+        # any Python-level split-on-"." helper, so keep it inline
+        feed.override = int(float(override))
+
+    def _parse_spindle(self, value: str):
+        """Spindle information"""
+        current_rpm, target_rpm, override, vacuum_mode, temperature, bed_temperature = (
+            _pad_fields(value.split(","), _SPINDLE_DEFAULTS)
         )
-        self.work_coordinate_offset.z = round(
-            self.machine_position.z - self.work_position.z, 3
+        spindle = self.spindle_info
+        spindle.current_rpm = float(current_rpm)
+        spindle.target_rpm = float(target_rpm)
+        spindle.override = int(float(override))
+        spindle.vacuum_mode = int(vacuum_mode)
+        spindle.temperature = float(temperature)
+        spindle.bed_temperature = float(bed_temperature)
+
+    def _parse_tool(self, value: str):
+        """Tool information"""
+        current_tool, tool_length_offset, target_tool = _pad_fields(
+            value.split(","), _TOOL_DEFAULTS
         )
-        self.work_coordinate_offset.a = round(
-            self.machine_position.a - self.work_position.a, 3
+        tool = self.tool_info
+        tool.current_tool = int(current_tool)
+        tool.tool_length_offset = float(tool_length_offset)
+        tool.target_tool = int(target_tool)
+
+    def _parse_workpiece_voltage(self, value: str):
+        """Workpiece voltage"""
+        self.workpiece_voltage = float(value)
+
+    def _parse_laser(self, value: str):
+        """Laser information"""
+        mode, state, testing, power, scale = _pad_fields(
+            value.split(","), _LASER_DEFAULTS
         )
-
-    def parse_diagnose_response(self, response: str) -> bool:
+        laser = self.laser_info
+        laser.mode = int(mode)
+        laser.state = int(state)
+        laser.testing = int(testing)
+        laser.power = float(power)
+        laser.scale = float(scale)
+
+    def _parse_playback(self, value: str):
+        """Playback information"""
+        lines, percent, seconds = _pad_fields(value.split(","), _PLAYBACK_DEFAULTS)
+        self.played_lines = int(lines)
+        self.played_percent = int(percent)
+        self.played_seconds = int(seconds)
+
+    def _parse_atc_state(self, value: str):
+        """ATC state"""
+        self.atc_state = int(value)
+
+    def _parse_max_delta(self, value: str):
+        """Max delta"""
+        self.max_delta = float(value)
+
+    def _parse_halt_reason(self, value: str):
+        """Halt reason"""
+        self.halt_reason = int(value)
+
+    def _parse_rotation(self, value: str):
+        """Rotation angle"""
+        self.rotation_angle = float(value)
+
+    def _parse_coord_system(self, value: str):
+        """Active coordinate system"""
+        self.active_coord_system = int(value)
+
+    def _parse_control_states(self, value: str):
+        """Control states (multi-value field)"""
+        # This appears to be a comma-separated list of control state values
+        # For now, we'll store it as a string since the exact meaning isn't clear
+        self.control_states = value
+
+    # Status field key -> handler, one dict lookup per field
+    _STATUS_HANDLERS: ClassVar[Dict[str, Callable[["CNC", str], None]]] = {
+        "MPos": _parse_mpos,
+        "WPos": _parse_wpos,
+        "F": _parse_feed,
+        "S": _parse_spindle,
+        "T": _parse_tool,
+        "W": _parse_workpiece_voltage,
+        "L": _parse_laser,
+        "P": _parse_playback,
+        "A": _parse_atc_state,
+        "O": _parse_max_delta,
+        "H": _parse_halt_reason,
+        "R": _parse_rotation,
+        "G": _parse_coord_system,
+        "C": _parse_control_states,
+    }
+
+    def _calculate_wco(
+        self, _round=round, _radians=math.radians, _cos=math.cos, _sin=math.sin
+    ):
+        """Calculate work coordinate offset from machine and work positions"""
+        # The default arguments bind the builtins as fast locals; never pass them
+        mpos = self.machine_position
+        wpos = self.work_position
+        wco = self.work_coordinate_offset
+
+        if self.rotation_angle == 0.0:
+            # No rotation (the usual 3-axis case), offset is a plain difference
+            wco.x = _round(mpos.x - wpos.x, 3)
+            wco.y = _round(mpos.y - wpos.y, 3)
+        else:
+            angle = _radians(self.rotation_angle)
+            cos_r = _cos(angle)
+            sin_r = _sin(angle)
+            wco.x = _round(mpos.x - (cos_r * wpos.x - sin_r * wpos.y), 3)
+            wco.y = _round(mpos.y - (sin_r * wpos.x + cos_r * wpos.y), 3)
+
+        wco.z = _round(mpos.z - wpos.z, 3)
+        wco.a = _round(mpos.a - wpos.a, 3)
+
+    def parse_diagnose_response(self, response: Union[str, bytes]) -> bool:
         """
         Parse diagnose response from CNC machine.
 
         Format: {S:0,5000|L:0,0|F:1,0|V:0,1|G:0|T:0|E:0,0,0,0,0,0|P:0,0|A:1,0}
 
         Args:
-            response: Diagnose response string from CNC machine
+            response: Diagnose response from CNC machine, as str or raw bytes
 
         Returns:
             bool: True if parsing was successful, False otherwise
         """
+        if isinstance(response, bytes):
+            response = _decode_response(response)
         if not response or not isinstance(response, str):
             return False
 
-        # Strip whitespace and check format
-        response = response.strip()
-        if not response.startswith("{") or not response.endswith("}"):
+        match = _DIAGNOSE_RE.fullmatch(response)
+        if match is None:
             return False
 
-        try:
-            # Remove braces
-            content = response[1:-1]
-
-            # Split by pipe character
-            parts = content.split("|")
-
-            # Parse each part
-            for part in parts:
-                if ":" not in part:
-                    continue
-
-                key, value = part.split(":", 1)
-                self._parse_diagnose_field(key, value)
+        # Parse each KEY:VALUE part
+        handlers = self._DIAGNOSE_HANDLERS
+        for key, value in _FIELD_RE.findall(match.group(1)):
+            handler = handlers.get(key)
+            if handler is None:
+                seen = self._unknown_diagnose_fields
+                if key not in seen and len(seen) < _MAX_UNKNOWN_FIELDS:
+                    seen.add(key)
+                    logger.debug("Ignoring unknown diagnose field %r", key)
+                continue
+            try:
+                values = [int(x) for x in value.split(",")]
+                values.extend(_DIAGNOSE_PADDING[len(values) :])
+                handler(self, values)
+            except (ValueError, IndexError):
+                # Skip malformed fields
+                pass
 
-            return True
-
-        except Exception as e:
-            # Log error in real implementation
-            return False
+        return True
 
-    def _parse_diagnose_field(self, key: str, value: str):
-        """Parse individual field from diagnose response"""
-        try:
-            values = [int(x) for x in value.split(",")]
-
-            if key == "S":
-                # Spindle switch and level
-                self.switches.spindle = values[0] if len(values) > 0 else 0
-                self.switch_levels.spindle = values[1] if len(values) > 1 else 0
-
-            elif key == "L":
-                # Laser switch and level
-                self.switches.laser = values[0] if len(values) > 0 else 0
-                self.switch_levels.laser = values[1] if len(values) > 1 else 0
-
-            elif key == "F":
-                # Spindle fan switch and level
-                self.switches.spindle_fan = values[0] if len(values) > 0 else 0
-                self.switch_levels.spindle_fan = values[1] if len(values) > 1 else 0
-
-            elif key == "V":
-                # Vacuum switch and level
-                self.switches.vacuum = values[0] if len(values) > 0 else 0
-                self.switch_levels.vacuum = values[1] if len(values) > 1 else 0
-
-            elif key == "G":
-                # Light switch
-                self.switches.light = values[0] if len(values) > 0 else 0
-
-            elif key == "T":
-                # Tool sensor power switch
-                self.switches.tool_sensor_pwr = values[0] if len(values) > 0 else 0
-
-            elif key == "R":
-                # Air switch
-                self.switches.air = values[0] if len(values) > 0 else 0
-
-            elif key == "C":
-                # Workpiece charge power switch
-                self.switches.wp_charge_pwr = values[0] if len(values) > 0 else 0
-
-            elif key == "E":
-                # Endstop sensors
-                self.sensors.x_min = values[0] if len(values) > 0 else 0
-                self.sensors.x_max = values[1] if len(values) > 1 else 0
-                self.sensors.y_min = values[2] if len(values) > 2 else 0
-                self.sensors.y_max = values[3] if len(values) > 3 else 0
-                self.sensors.z_max = values[4] if len(values) > 4 else 0
-                self.sensors.cover = values[5] if len(values) > 5 else 0
-
-            elif key == "P":
-                # Probe sensors
-                self.sensors.probe = values[0] if len(values) > 0 else 0
-                self.sensors.calibrate = values[1] if len(values) > 1 else 0
-
-            elif key == "A":
-                # ATC sensors
-                self.sensors.atc_home = values[0] if len(values) > 0 else 0
-                self.sensors.tool_sensor = values[1] if len(values) > 1 else 0
-
-            elif key == "I":
-                # E-stop sensor
-                self.sensors.e_stop = values[0] if len(values) > 0 else 0
-
-        except (ValueError, IndexError):
-            # Skip malformed fields
-            pass
-
-    def parse_state_response(self, response: str) -> bool:
+    def _parse_diag_spindle(self, values: List[int]):
+        """Spindle switch and level"""
+        self.switches.spindle = values[0]
+        self.switch_levels.spindle = values[1]
+
+    def _parse_diag_laser(self, values: List[int]):
+        """Laser switch and level"""
+        self.switches.laser = values[0]
+        self.switch_levels.laser = values[1]
+
+    def _parse_diag_spindle_fan(self, values: List[int]):
+        """Spindle fan switch and level"""
+        self.switches.spindle_fan = values[0]
+        self.switch_levels.spindle_fan = values[1]
+
+    def _parse_diag_vacuum(self, values: List[int]):
+        """Vacuum switch and level"""
+        self.switches.vacuum = values[0]
+        self.switch_levels.vacuum = values[1]
+
+    def _parse_diag_light(self, values: List[int]):
+        """Light switch"""
+        self.switches.light = values[0]
+
+    def _parse_diag_tool_sensor_pwr(self, values: List[int]):
+        """Tool sensor power switch"""
+        self.switches.tool_sensor_pwr = values[0]
+
+    def _parse_diag_air(self, values: List[int]):
+        """Air switch"""
+        self.switches.air = values[0]
+
+    def _parse_diag_wp_charge_pwr(self, values: List[int]):
+        """Workpiece charge power switch"""
+        self.switches.wp_charge_pwr = values[0]
+
+    def _parse_diag_endstops(self, values: List[int]):
+        """Endstop sensors"""
+        self.sensors.x_min = values[0]
+        self.sensors.x_max = values[1]
+        self.sensors.y_min = values[2]
+        self.sensors.y_max = values[3]
+        self.sensors.z_max = values[4]
+        self.sensors.cover = values[5]
+
+    def _parse_diag_probe(self, values: List[int]):
+        """Probe sensors"""
+        self.sensors.probe = values[0]
+        self.sensors.calibrate = values[1]
+
+    def _parse_diag_atc(self, values: List[int]):
+        """ATC sensors"""
+        self.sensors.atc_home = values[0]
+        self.sensors.tool_sensor = values[1]
+
+    def _parse_diag_e_stop(self, values: List[int]):
+        """E-stop sensor"""
+        self.sensors.e_stop = values[0]
+
+    # Diagnose field key -> handler, called with the int values padded to six
+    _DIAGNOSE_HANDLERS: ClassVar[Dict[str, Callable[["CNC", List[int]], None]]] = {
+        "S": _parse_diag_spindle,
+        "L": _parse_diag_laser,
+        "F": _parse_diag_spindle_fan,
+        "V": _parse_diag_vacuum,
+        "G": _parse_diag_light,
+        "T": _parse_diag_tool_sensor_pwr,
+        "R": _parse_diag_air,
+        "C": _parse_diag_wp_charge_pwr,
+        "E": _parse_diag_endstops,
+        "P": _parse_diag_probe,
+        "A": _parse_diag_atc,
+        "I": _parse_diag_e_stop,
+    }
+
+    def parse_state_response(self, response: Union[str, bytes]) -> bool:
         """
         Parse state response from CNC machine ($G or $I command).
 
         Format: [G0 G54 G17 G21 G90 G94 M0 M5 M9 T0 F3000.0000 S1.0000]
 
         Args:
-            response: State response string from CNC machine
+            response: State response from CNC machine, as str or raw bytes
 
         Returns:
             bool: True if parsing was successful, False otherwise
         """
+        if isinstance(response, bytes):
+            response = _decode_response(response)
         if not response or not isinstance(response, str):
             return False
 
-        # Strip whitespace and check format
-        response = response.strip()
-        if not response.startswith("[") or not response.endswith("]"):
+        match = _STATE_RE.fullmatch(response)
+        if match is None:
             return False
 
-        try:
-            # Remove brackets and split by spaces
-            content = response[1:-1]
-            parts = content.split()
-
-            for part in parts:
-                if part.startswith("G"):
-                    # G-code modal states
-                    if part in ["G54", "G55", "G56", "G57", "G58", "G59"]:
-                        self.wcs.active_wcs = part
-                elif part.startswith("T"):
-                    # Tool number
-                    try:
-                        tool_num = int(part[1:])
-                        self.tool_info.current_tool = tool_num
-                    except ValueError:
-                        pass
-                elif part.startswith("F"):
-                    # Feed rate
-                    try:
-                        feed_rate = float(part[1:])
-                        self.feed_info.target = feed_rate
-                    except ValueError:
-                        pass
-                elif part.startswith("S"):
-                    # Spindle speed
-                    try:
-                        spindle_speed = float(part[1:])
-                        self.spindle_info.target_rpm = spindle_speed
-                    except ValueError:
-                        pass
+        # Split the bracketed content by spaces
+        parts = match.group(1).split()
 
-            return True
+        for part in parts:
+            if part.startswith("G"):
+                # G-code modal states
+                if part in _WCS_CODES:
+                    self.wcs.active_wcs = part
+            elif part.startswith("T"):
+                # Tool number
+                try:
+                    tool_num = int(part[1:])
+                    self.tool_info.current_tool = tool_num
+                except ValueError:
+                    pass
+            elif part.startswith("F"):
+                # Feed rate
+                try:
+                    feed_rate = float(part[1:])
+                    self.feed_info.target = feed_rate
+                except ValueError:
+                    pass
+            elif part.startswith("S"):
+                # Spindle speed
+                try:
+                    spindle_speed = float(part[1:])
+                    self.spindle_info.target_rpm = spindle_speed
+                except ValueError:
+                    pass
+
+        return True
+
+    # Opening bracket -> parser for that response type
+    _RESPONSE_PARSERS: ClassVar[
+        Dict[str, Callable[["CNC", Union[str, bytes]], bool]]
+    ] = {
+        "<": parse_status_response,
+        "{": parse_diagnose_response,
+        "[": parse_state_response,
+    }
+
+    def parse_response(self, response: Union[str, bytes]) -> bool:
+        """
+        Parse any status, diagnose or state response from CNC machine.
+
+        The response type is picked from its opening bracket: <...> status,
+        {...} diagnose, [...] state.
 
-        except Exception as e:
-            # Log error in real implementation
+        Args:
+            response: Response from CNC machine, as str or raw bytes
+
+        Returns:
+            bool: True if parsing was successful, False otherwise
+        """
+        if isinstance(response, bytes):
+            response = _decode_response(response)
+        if not response or not isinstance(response, str):
             return False
 
+        parser = self._RESPONSE_PARSERS.get(response.lstrip()[:1])
+        if parser is None:
+            return False
+
+        return parser(self, response)
+
     # Time management methods
     def set_time(self, epoch_time: float) -> bool:
         """
@@ -618,7 +832,7 @@ class CNC:
 
             # Store the initial epoch time and current system time
             self._initial_epoch_time = epoch_time
-            self._system_time_at_init = time.time()
+            self._system_time_at_init = time.monotonic()
             self._time_initialized = True
 
             return True
@@ -632,19 +846,13 @@ class CNC:
         Returns:
             Optional[float]: Current time in Unix epoch format, or None if not initialized
         """
-        if (
-            not self._time_initialized
-            or self._initial_epoch_time is None
-            or self._system_time_at_init is None
-        ):
+        if not self._time_initialized:
             return None
 
-        # Calculate elapsed time since initialization
-        current_system_time = time.time()
-        elapsed_time = current_system_time - self._system_time_at_init
-
-        # Return the initial time plus elapsed time
-        return self._initial_epoch_time + elapsed_time
+        # Return the initial time plus monotonic time elapsed since it was set
+        return self._initial_epoch_time + (
+            time.monotonic() - self._system_time_at_init
+        )
 
     def get_current_datetime(self) -> Optional[datetime]:
         """
@@ -801,73 +1009,5 @@ class CNC:
             f"{time_info}".rstrip()
         )
 
-    def get_status_dict(self) -> Dict[str, Any]:
-        """Get current status as dictionary for serialization"""
-        return {
-            "state": self.state.value,
-            "machine_position": {
-                "x": self.machine_position.x,
-                "y": self.machine_position.y,
-                "z": self.machine_position.z,
-                "a": self.machine_position.a,
-                "b": self.machine_position.b,
-            },
-            "work_position": {
-                "x": self.work_position.x,
-                "y": self.work_position.y,
-                "z": self.work_position.z,
-                "a": self.work_position.a,
-                "b": self.work_position.b,
-            },
-            "feed_info": {
-                "current": self.feed_info.current,
-                "target": self.feed_info.target,
-                "override": self.feed_info.override,
-            },
-            "spindle_info": {
-                "current_rpm": self.spindle_info.current_rpm,
-                "target_rpm": self.spindle_info.target_rpm,
-                "override": self.spindle_info.override,
-                "temperature": self.spindle_info.temperature,
-            },
-            "tool_info": {
-                "current_tool": self.tool_info.current_tool,
-                "tool_length_offset": self.tool_info.tool_length_offset,
-                "target_tool": self.tool_info.target_tool,
-            },
-            "laser_info": {
-                "mode": self.laser_info.mode,
-                "state": self.laser_info.state,
-                "power": self.laser_info.power,
-                "scale": self.laser_info.scale,
-            },
-            "switches": {
-                "spindle": self.switches.spindle,
-                "spindle_fan": self.switches.spindle_fan,
-                "vacuum": self.switches.vacuum,
-                "light": self.switches.light,
-                "tool_sensor_pwr": self.switches.tool_sensor_pwr,
-                "air": self.switches.air,
-                "wp_charge_pwr": self.switches.wp_charge_pwr,
-                "laser": self.switches.laser,
-            },
-            "switch_levels": {
-                "spindle": self.switch_levels.spindle,
-                "spindle_fan": self.switch_levels.spindle_fan,
-                "vacuum": self.switch_levels.vacuum,
-                "laser": self.switch_levels.laser,
-            },
-            "sensors": {
-                "x_min": self.sensors.x_min,
-                "x_max": self.sensors.x_max,
-                "y_min": self.sensors.y_min,
-                "y_max": self.sensors.y_max,
-                "z_max": self.sensors.z_max,
-                "cover": self.sensors.cover,
-                "probe": self.sensors.probe,
-                "calibrate": self.sensors.calibrate,
-                "atc_home": self.sensors.atc_home,
-                "tool_sensor": self.sensors.tool_sensor,
-                "e_stop": self.sensors.e_stop,
-            },
-        }
+    # Generated from _STATUS_DICT_GROUPS, see _compile_status_exporters
+    get_status_dict, get_status_flat = _compile_status_exporters()
@@ -5,11 +5,15 @@ A TCP server that simulates a CNC machine by responding to commands
 with canned responses based on the commands.json configuration.
 """
 
+import argparse
 import asyncio
+import concurrent.futures
+import functools
 import json
 import logging
 import os
 import re
+import threading
 import time
 import hashlib
 import io
@@ -17,9 +21,97 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple, List
 
-from .logging_config import setup_logging, ColoredFormatter
+from .logging_config import setup_logging, ColoredFormatter, log_trace
 from .xmodem import XMODEMProtocol
 
+# orjson parses the artifact files about twice as fast when it is installed;
+# its decode errors subclass json.JSONDecodeError, so handlers are unchanged
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+
+# Leading G-code or M-code word, matched case-insensitively on the letter only
+_CODE_RE = re.compile(r"([GgMm])(\d+(?:\.\d+)?)")
+
+# End of a regular (non-instant) command line
+_EOL_RE = re.compile(rb"[\r\n]")
+
+# Whitespace str.strip() removes from an ASCII command line
+_ASCII_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+# Most client bytes taken from the socket per read while parsing commands
+_READ_CHUNK = 4096
+
+# Reply to a line that matches no command, with its framed bytes kept ready
+_UNKNOWN_RESPONSE = "ERROR: Unknown command"
+_UNKNOWN_PAYLOAD = b"ERROR: Unknown command\n"
+
+# Largest epoch accepted by "time = N" (max signed 32-bit timestamp)
+_MAX_EPOCH_TIME = 2147483647
+
+
+# Bundled command and virtual file definitions
+_ARTIFACTS_DIR = Path(__file__).parent.parent / "artifacts"
+
+
+@functools.lru_cache(maxsize=None)
+def _read_artifact(name: str) -> Any:
+    """Parse a bundled JSON artifact once per process; callers copy to mutate."""
+    return _json_loads((_ARTIFACTS_DIR / name).read_bytes())
+
+
+def _has_next_command(pending: bytearray) -> bool:
+    """Return whether pending holds a complete, non-blank command line."""
+    match = _EOL_RE.search(pending)
+    return match is not None and bool(pending[: match.start()].strip(_ASCII_WHITESPACE))
+
+
+@functools.lru_cache(maxsize=256)
+def _resolve_path(cwd: str, path: str) -> str:
+    """Resolve path against cwd and normalize it (pure, so results are cached)."""
+    if not path.startswith("/"):
+        path = os.path.join(cwd, path)
+    return os.path.normpath(path)
+
+
+def _encoded_contents(file_info: Dict[str, Any]) -> Tuple[bytes, str]:
+    """
+    Return a virtual file's bytes together with their MD5.
+
+    Uploaded files keep their raw bytes under "data"; files defined by text
+    "contents" are encoded as UTF-8. The result is cached in file_info under
+    "_encoded" along with the value it was built from, so repeat downloads
+    skip the encode and hash passes while a replaced value is still picked up.
+    """
+    source = file_info.get("data")
+    if source is None:
+        source = file_info.get("contents", "")
+    cached = file_info.get("_encoded")
+    if cached is None or cached[0] is not source:
+        data = source if isinstance(source, bytes) else source.encode("utf-8")
+        cached = (source, data, hashlib.md5(data).hexdigest())
+        file_info["_encoded"] = cached
+    return cached[1], cached[2]
+
+
+def _file_text(file_info: Dict[str, Any]) -> str:
+    """Return a virtual file's contents as text, decoding uploaded bytes."""
+    contents = file_info.get("contents")
+    if contents is None:
+        # Uploads are stored as raw bytes; binary data shows as U+FFFD
+        contents = file_info.get("data", b"").decode("utf-8", errors="replace")
+    return contents
+
+
+# Colored "[RECV]: " / "[SEND]: " tags, built once since COLORS is read-only
+_LOG_PREFIX = {
+    prefix: f"[{ColoredFormatter.COLORS[prefix]}{prefix}"
+    f"{ColoredFormatter.COLORS['RESET']}]: "
+    for prefix in ("RECV", "SEND")
+}
+
 
 def _format_multiline_log(message: str, prefix: str) -> str:
     """
@@ -33,7 +125,7 @@ def _format_multiline_log(message: str, prefix: str) -> str:
         Formatted message with aligned continuation lines
     """
     if "\n" not in message:
-        return f"[{ColoredFormatter.COLORS[prefix]}{prefix}{ColoredFormatter.COLORS['RESET']}]: {message}"
+        return _LOG_PREFIX[prefix] + message
 
     lines = message.split("\n")
 
@@ -45,9 +137,7 @@ def _format_multiline_log(message: str, prefix: str) -> str:
     padding = " " * padding_length
 
     # Format first line with full prefix
-    result_lines = [
-        f"[{ColoredFormatter.COLORS[prefix]}{prefix}{ColoredFormatter.COLORS['RESET']}]: {lines[0]}"
-    ]
+    result_lines = [_LOG_PREFIX[prefix] + lines[0]]
 
     # Format continuation lines with padding
     for line in lines[1:]:
@@ -56,77 +146,330 @@ def _format_multiline_log(message: str, prefix: str) -> str:
     return "\n".join(result_lines)
 
 
+class _VirtualFileTable(dict):
+    """
+    Path -> file info mapping that also keeps a tree of path components.
+
+    Directory queries walk the tree (one dict lookup per path component)
+    instead of scanning every path. Mutations go through __setitem__ and
+    __delitem__, so the tree stays in step even when callers assign to
+    virtual_files directly. A lock serializes tree updates and walks, since
+    XMODEM uploads add files from a worker thread. Directory existence is
+    answered from a count of files below each directory path, without the
+    lock: a single dict lookup is atomic. Sorted listings are cached per
+    directory and dropped whenever a path below that directory changes.
+
+    File info values stay plain dicts rather than a __slots__ record: that is
+    the documented, JSON-shaped format callers read, assign and copy, and the
+    ~180 bytes a slotted object saves per entry is small next to contents.
+    """
+
+    # Marks a tree node whose path is itself a key of the table
+    _FILE = None
+
+    def __init__(self, files=()):
+        super().__init__()
+        self._tree: Dict[Optional[str], Any] = {}
+        self._dir_counts: Dict[str, int] = {}
+        self._listings: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self.update(files)
+
+    def __setitem__(self, path: str, info: Dict[str, Any]) -> None:
+        with self._lock:
+            if path not in self:
+                node = self._tree
+                for name in path.split("/"):
+                    node = node.setdefault(name, {})
+                node[self._FILE] = True
+                for parent in self._parents(path):
+                    self._dir_counts[parent] = self._dir_counts.get(parent, 0) + 1
+                    self._listings.pop(parent, None)
+            super().__setitem__(path, info)
+
+    def __delitem__(self, path: str) -> None:
+        with self._lock:
+            super().__delitem__(path)
+            self._unlink(path)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs) -> None:
+        for path, info in dict(*args, **kwargs).items():
+            self[path] = info
+
+    def setdefault(self, path, default=None):
+        if path not in self:
+            self[path] = default
+        return self[path]
+
+    def pop(self, path, *default):
+        if path not in self:
+            if default:
+                return default[0]
+            raise KeyError(path)
+        info = self[path]
+        del self[path]
+        return info
+
+    def popitem(self):
+        with self._lock:
+            path, info = super().popitem()
+            self._unlink(path)
+        return path, info
+
+    def clear(self) -> None:
+        with self._lock:
+            super().clear()
+            self._tree = {}
+            self._dir_counts = {}
+            self._listings = {}
+
+    @staticmethod
+    def _parents(path: str):
+        """Yield each directory above path ("/a/b/c" -> "", "/a", "/a/b")."""
+        end = path.find("/")
+        while end >= 0:
+            yield path[:end]
+            end = path.find("/", end + 1)
+
+    def _unlink(self, path: str) -> None:
+        """Drop path's file marker and prune tree nodes left empty."""
+        for parent in self._parents(path):
+            self._listings.pop(parent, None)
+            if self._dir_counts[parent] == 1:
+                del self._dir_counts[parent]
+            else:
+                self._dir_counts[parent] -= 1
+        names = path.split("/")
+        nodes = [self._tree]
+        for name in names:
+            nodes.append(nodes[-1][name])
+        del nodes[-1][self._FILE]
+        for depth in range(len(names) - 1, -1, -1):
+            if nodes[depth + 1]:
+                break
+            del nodes[depth][names[depth]]
+
+    def _dir_node(self, dir_path: str) -> Optional[Dict[Optional[str], Any]]:
+        """Return the tree node for a directory path (trailing slashes ignored)."""
+        dir_path = dir_path.rstrip("/")
+        node = self._tree
+        for name in dir_path.split("/") if dir_path else ("",):
+            node = node.get(name)
+            if node is None:
+                return None
+        return node
+
+    def list_dir(self, dir_path: str) -> List[str]:
+        """Return sorted entry names in dir_path, subdirectories ending in '/'."""
+        dir_path = dir_path.rstrip("/")
+        listing = self._listings.get(dir_path)
+        if listing is None:
+            with self._lock:
+                node = self._dir_node(dir_path)
+                if node is None:
+                    return []
+
+                listing = []
+                for name, child in node.items():
+                    if name is self._FILE:
+                        continue
+                    if self._FILE in child:
+                        listing.append(name)
+                    if len(child) > (self._FILE in child):
+                        listing.append(name + "/")
+                listing.sort()
+                self._listings[dir_path] = listing
+        return list(listing)
+
+    def has_dir(self, dir_path: str) -> bool:
+        """Return True if any path lies below dir_path (root always exists)."""
+        dir_path = dir_path.rstrip("/")
+        return not dir_path or dir_path in self._dir_counts
+
+
+class _HashingBytesIO(io.BytesIO):
+    """BytesIO that feeds every write into an MD5 as the data arrives."""
+
+    def __init__(self):
+        super().__init__()
+        self.md5 = hashlib.md5()
+
+    def write(self, data) -> int:
+        self.md5.update(data)
+        return super().write(data)
+
+
+class _ClientReader:
+    """
+    StreamReader wrapper that holds bytes read past the end of a command.
+
+    Commands are read in chunks, so a chunk can end in the start of the next
+    command or in XMODEM data sent right after an upload/download command.
+    Those bytes wait in pending, which readexactly() serves first.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader):
+        self.reader = reader
+        self.pending = bytearray()
+
+    async def readexactly(self, n: int) -> bytes:
+        if len(self.pending) >= n:
+            data = bytes(self.pending[:n])
+            del self.pending[:n]
+            return data
+        # pending is only consumed once the read completes, so a cancelled
+        # (timed out) read leaves every byte in place for the retry
+        rest = await self.reader.readexactly(n - len(self.pending))
+        data = bytes(self.pending) + rest
+        self.pending.clear()
+        return data
+
+
 class MockCNCServer:
     """Mock CNC server that responds to commands with canned responses."""
 
-    def __init__(self, host: str = "localhost", port: int = 2222):
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 2222,
+        simulate_latency: bool = True,
+        max_connections: Optional[int] = 2,
+    ):
+        if max_connections is not None and max_connections < 1:
+            raise ValueError(
+                f"max_connections must be None or at least 1, got {max_connections}"
+            )
         self.host = host
         self.port = port
+        # Delay each response by the command's time_ms (at least 100ms)
+        self.simulate_latency = simulate_latency
         self.commands = self._load_commands()
-        self.active_connections = set()  # Track up to 2 active connections
-        self.max_connections = 2
+        self._build_command_tables()
+        # Clients beyond max_connections are turned away (None = no limit)
+        self.active_connections = set()
+        self.max_connections = max_connections
         self.logger = logging.getLogger(__name__)
 
+        # XMODEM transfers block on their client's socket for their whole
+        # duration, so they get their own threads (one per connection at most)
+        # rather than tying up the loop's default executor
+        self._transfer_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_connections, thread_name_prefix="xmodem"
+        )
+
         # Time tracking
         self._time_initialized = False
         self._initial_epoch_time = None
         self._system_time_at_init = None
 
         # Virtual filesystem
-        self.virtual_files = self._load_virtual_files()
+        self.virtual_files = _VirtualFileTable(self._load_virtual_files())
         self.connection_cwd = {}  # Per-connection current working directory
 
     def _load_commands(self) -> Dict[str, Any]:
         """Load command definitions from commands.json."""
-        commands_file = Path(__file__).parent.parent / "artifacts" / "commands.json"
-        with open(commands_file, "r") as f:
-            return json.load(f)
+        # The parsed file is shared between servers; each one gets its own
+        # section and definition dicts, which _build_command_tables writes to
+        return {
+            section: {cmd_key: dict(cmd_def) for cmd_key, cmd_def in defs.items()}
+            for section, defs in _read_artifact("commands.json").items()
+        }
+
+    def _build_command_tables(self) -> None:
+        """Index self.commands so _parse_command avoids scanning every entry."""
+        # Host commands are prefixes: a character trie finds the longest key
+        # the line starts with in one walk, bailing on the first character
+        # for most lines; the None slot of a node holds (key, def) for a key
+        self._host_trie: Dict[Optional[str], Any] = {}
+        for cmd_key, cmd_def in self.commands.get("host_commands", {}).items():
+            node = self._host_trie
+            for char in cmd_key:
+                node = node.setdefault(char, {})
+            node[None] = (cmd_key, cmd_def)
+
+        # G/M code tables by the code letter as typed, so a _CODE_RE match
+        # needs no case folding to find its table
+        self._code_tables: Dict[str, Dict[str, Any]] = {}
+        for letter in "GM":
+            codes = self.commands.get(f"{letter.lower()}_codes", {})
+            self._code_tables[letter] = self._code_tables[letter.lower()] = codes
+
+        # Console commands match the first word case-insensitively. G/M codes
+        # share the table, so a line whose first word is a whole code (the
+        # usual "G1 X10") is classified by this one lookup; console commands
+        # are added first and keep precedence, as in _parse_command's order
+        self._word_map: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        for cmd_key, cmd_def in self.commands.get("console_commands", {}).items():
+            self._word_map.setdefault(cmd_key.lower(), (cmd_key, cmd_def))
+        for letter in "GM":
+            for cmd_key, cmd_def in self._code_tables[letter].items():
+                if cmd_key[:1] == letter and _CODE_RE.fullmatch(cmd_key):
+                    self._word_map.setdefault(cmd_key.lower(), (cmd_key, cmd_def))
+
+        # Lowercased leading bytes of every instant command: a buffer that does
+        # not start with one of these can never parse as an instant command
+        self._instant_prefixes = tuple(
+            cmd_key.lower().encode("utf-8")
+            for section in self.commands.values()
+            for cmd_key, cmd_def in section.items()
+            if cmd_def.get("instant", False)
+        )
+
+        # Canned responses and delays never change, so each command's framed
+        # wire bytes and simulated latency are worked out here once instead of
+        # per request
+        for section in self.commands.values():
+            for cmd_def in section.values():
+                cmd_def["_payload"] = self._frame_response(
+                    self._get_response(cmd_def), cmd_def
+                )
+                cmd_def["_delay_s"] = self._latency(cmd_def)
 
     def _load_virtual_files(self) -> Dict[str, Dict[str, Any]]:
         """Load virtual filesystem from virtual_files.json."""
-        virtual_files_file = (
-            Path(__file__).parent.parent / "artifacts" / "virtual_files.json"
-        )
         try:
-            with open(virtual_files_file, "r") as f:
-                files_data = json.load(f)
-                # Handle both array format and object format
-                if isinstance(files_data, list):
-                    # Array format - convert to dict keyed by path
-                    virtual_files = {}
-                    for file_info in files_data:
-                        # Parse timestamp if present
-                        file_data = file_info.copy()
-                        if "timestamp" in file_data:
-                            file_data["timestamp_parsed"] = self._parse_timestamp(
-                                file_data["timestamp"]
-                            )
-                        virtual_files[file_info["path"]] = file_data
-                    return virtual_files
-                elif isinstance(files_data, dict) and "files" in files_data:
-                    # Object format with "files" key
-                    virtual_files = {}
-                    for file_info in files_data["files"]:
-                        # Parse timestamp if present
-                        file_data = file_info.copy()
-                        if "timestamp" in file_data:
-                            file_data["timestamp_parsed"] = self._parse_timestamp(
-                                file_data["timestamp"]
-                            )
-                        virtual_files[file_info["path"]] = file_data
-                    return virtual_files
-                else:
-                    # Direct dict format
-                    virtual_files = {}
-                    for path, file_info in files_data.items():
-                        # Parse timestamp if present
-                        file_data = file_info.copy()
-                        if "timestamp" in file_data:
-                            file_data["timestamp_parsed"] = self._parse_timestamp(
-                                file_data["timestamp"]
-                            )
-                        virtual_files[path] = file_data
-                    return virtual_files
+            files_data = _read_artifact("virtual_files.json")
+            # Handle both array format and object format
+            if isinstance(files_data, list):
+                # Array format - convert to dict keyed by path
+                virtual_files = {}
+                for file_info in files_data:
+                    # Parse timestamp if present
+                    file_data = file_info.copy()
+                    if "timestamp" in file_data:
+                        file_data["timestamp_parsed"] = self._parse_timestamp(
+                            file_data["timestamp"]
+                        )
+                    virtual_files[file_info["path"]] = file_data
+                return virtual_files
+            elif isinstance(files_data, dict) and "files" in files_data:
+                # Object format with "files" key
+                virtual_files = {}
+                for file_info in files_data["files"]:
+                    # Parse timestamp if present
+                    file_data = file_info.copy()
+                    if "timestamp" in file_data:
+                        file_data["timestamp_parsed"] = self._parse_timestamp(
+                            file_data["timestamp"]
+                        )
+                    virtual_files[file_info["path"]] = file_data
+                return virtual_files
+            else:
+                # Direct dict format
+                virtual_files = {}
+                for path, file_info in files_data.items():
+                    # Parse timestamp if present
+                    file_data = file_info.copy()
+                    if "timestamp" in file_data:
+                        file_data["timestamp_parsed"] = self._parse_timestamp(
+                            file_data["timestamp"]
+                        )
+                    virtual_files[path] = file_data
+                return virtual_files
         except (FileNotFoundError, json.JSONDecodeError, KeyError) as e:
             self.logger.warning(f"Could not load virtual files: {e}")
             return {}
@@ -147,34 +490,36 @@ class MockCNCServer:
         self, command_line: str
     ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
         """Parse a command line and return the command key and definition."""
+        # Not memoized: streamed motion lines are nearly all unique, and an
+        # lru_cache miss costs more than this whole lookup on a cache hit saves
         command_line = command_line.strip()
 
         # Check host commands first (they have specific patterns)
-        for cmd_key, cmd_def in self.commands.get("host_commands", {}).items():
-            if command_line.startswith(cmd_key):
-                return cmd_key, cmd_def
+        host_cmd = None
+        node = self._host_trie
+        for char in command_line:
+            node = node.get(char)
+            if node is None:
+                break
+            host_cmd = node.get(None, host_cmd)
+        if host_cmd is not None:
+            return host_cmd
 
-        # Check console commands
-        cmd_parts = command_line.split()
+        # Check console commands, and G/M codes written as a separate word
+        cmd_parts = command_line.split(None, 1)
         if cmd_parts:
-            base_cmd = cmd_parts[0].lower()
-            for cmd_key, cmd_def in self.commands.get("console_commands", {}).items():
-                if cmd_key.lower() == base_cmd:
-                    return cmd_key, cmd_def
-
-        # Check G-codes (case insensitive)
-        g_match = re.match(r"^(G\d+(?:\.\d+)?)", command_line.upper())
-        if g_match:
-            g_code = g_match.group(1)
-            if g_code in self.commands.get("g_codes", {}):
-                return g_code, self.commands["g_codes"][g_code]
-
-        # Check M-codes (case insensitive)
-        m_match = re.match(r"^(M\d+(?:\.\d+)?)", command_line.upper())
-        if m_match:
-            m_code = m_match.group(1)
-            if m_code in self.commands.get("m_codes", {}):
-                return m_code, self.commands["m_codes"][m_code]
+            word_cmd = self._word_map.get(cmd_parts[0].lower())
+            if word_cmd is not None:
+                return word_cmd
+
+        # Check G-codes and M-codes run into their arguments, e.g. "G1X10"
+        code_match = _CODE_RE.match(command_line)
+        if code_match:
+            letter, number = code_match.groups()
+            code = letter.upper() + number
+            cmd_def = self._code_tables[letter].get(code)
+            if cmd_def is not None:
+                return code, cmd_def
 
         return None, None
 
@@ -183,56 +528,74 @@ class MockCNCServer:
         cmd_key, cmd_def = self._parse_command(command)
         return cmd_def is not None and cmd_def.get("instant", False)
 
-    async def _read_command_data(
-        self, reader: asyncio.StreamReader, timeout: float
-    ) -> str:
+    async def _read_command_data(self, reader: _ClientReader, timeout: float) -> str:
         """Read command data, handling instant commands that don't wait for newline."""
-        buffer = b""
+        buffer = bytearray()
+        pending = reader.pending
+        instant_prefixes = self._instant_prefixes
 
         while True:
-            # Read one byte with timeout
-            try:
-                byte = await asyncio.wait_for(reader.read(1), timeout=timeout)
-            except asyncio.TimeoutError:
-                raise  # Re-raise timeout to be handled by caller
-
-            if not byte:
-                # Connection closed
-                if buffer:
-                    return buffer.decode("utf-8").strip()
-                else:
-                    return ""
-
-            buffer += byte
-
-            # Check if we have a newline (end of regular command)
-            if byte in (b"\n", b"\r"):
-                return buffer.decode("utf-8").strip()
+            if not pending:
+                # Read whatever has arrived; only inactivity times out
+                try:
+                    chunk = await asyncio.wait_for(
+                        reader.reader.read(_READ_CHUNK), timeout=timeout
+                    )
+                except asyncio.TimeoutError:
+                    raise  # Re-raise timeout to be handled by caller
 
-            # Check if current buffer is an instant command
-            try:
-                current_str = buffer.decode("utf-8")
-                if self._is_instant_command(current_str):
-                    return current_str.strip()
-            except UnicodeDecodeError:
-                # Continue reading if we have incomplete UTF-8
-                continue
+                if not chunk:
+                    # Connection closed
+                    if buffer:
+                        return buffer.decode("utf-8").strip()
+                    else:
+                        return ""
+                pending += chunk
+
+            # A command ends at the first newline (end of regular command)
+            match = _EOL_RE.search(pending)
+            line_end = match.start() if match else len(pending)
+
+            # Check whether the command so far becomes an instant command before
+            # the newline. Stay in bytes until it could be one, stripping the
+            # same ASCII whitespace as str.strip() (\x1c-\x1f included); non-ASCII
+            # input takes the full str check since str.strip() also removes
+            # Unicode whitespace. Both tests only turn true as bytes are added,
+            # so if the whole line fails them, so does every shorter prefix
+            line = buffer + pending[:line_end]
+            if not line.isascii() or (
+                instant_prefixes
+                and line.lstrip(_ASCII_WHITESPACE).lower().startswith(instant_prefixes)
+            ):
+                for i in range(len(buffer), len(line)):
+                    try:
+                        current_str = line[: i + 1].decode("utf-8")
+                    except UnicodeDecodeError:
+                        # Continue reading if we have incomplete UTF-8
+                        continue
+                    if self._is_instant_command(current_str):
+                        del pending[: i + 1 - len(buffer)]
+                        return current_str.strip()
+
+            if match:
+                # The newline is left out of the decode; strip() drops it anyway
+                del pending[: line_end + 1]
+                return line.decode("utf-8").strip()
+            buffer = line
+            pending.clear()
 
     def _set_time(self, epoch_time: float) -> bool:
         """Set the server time using Unix epoch format."""
-        try:
-            # Validate the epoch time (reasonable range check)
-            if epoch_time < 0 or epoch_time > 2147483647:  # Max 32-bit timestamp
-                return False
+        # Validate the epoch time (reasonable range check, rejects NaN too)
+        if not 0 <= epoch_time <= _MAX_EPOCH_TIME:
+            return False
 
-            # Store the initial epoch time and current system time
-            self._initial_epoch_time = epoch_time
-            self._system_time_at_init = time.time()
-            self._time_initialized = True
+        # Store the initial epoch time and current system time
+        self._initial_epoch_time = epoch_time
+        self._system_time_at_init = time.time()
+        self._time_initialized = True
 
-            return True
-        except (ValueError, TypeError):
-            return False
+        return True
 
     def _get_current_time(self) -> Optional[float]:
         """Get the current calculated time in Unix epoch format."""
@@ -261,45 +624,13 @@ class MockCNCServer:
 
     def _normalize_path(self, path: str, client_addr: str) -> str:
         """Normalize a path (resolve relative paths, clean up)."""
-        if not path.startswith("/"):
-            # Relative path - resolve against current working directory
-            cwd = self._get_connection_cwd(client_addr)
-            path = os.path.join(cwd, path)
-
-        # Normalize the path (remove . and .. components)
-        return os.path.normpath(path)
+        # Relative paths resolve against the connection's working directory;
+        # keyed on (cwd, path), so cached results never need invalidating
+        return _resolve_path(self._get_connection_cwd(client_addr), path)
 
     def _get_directory_contents(self, dir_path: str) -> List[str]:
         """Get contents of a directory from virtual filesystem."""
-        dir_path = dir_path.rstrip("/")
-        if dir_path == "":
-            dir_path = "/"
-
-        contents = set()
-
-        for file_path in self.virtual_files.keys():
-            # Check if this file is in the requested directory
-            if file_path.startswith(dir_path + "/") or (
-                dir_path == "/" and file_path.startswith("/")
-            ):
-                # Get the relative path from the directory
-                if dir_path == "/":
-                    relative_path = file_path[1:]  # Remove leading /
-                else:
-                    relative_path = file_path[
-                        len(dir_path) + 1 :
-                    ]  # Remove dir_path + /
-
-                # Get the first component (file or subdirectory name)
-                if "/" in relative_path:
-                    # This is a subdirectory
-                    subdir_name = relative_path.split("/")[0]
-                    contents.add(subdir_name + "/")
-                else:
-                    # This is a file in the directory
-                    contents.add(relative_path)
-
-        return sorted(list(contents))
+        return self.virtual_files.list_dir(dir_path)
 
     def _file_exists(self, file_path: str) -> bool:
         """Check if a file exists in the virtual filesystem."""
@@ -307,15 +638,7 @@ class MockCNCServer:
 
     def _directory_exists(self, dir_path: str) -> bool:
         """Check if a directory exists in the virtual filesystem."""
-        dir_path = dir_path.rstrip("/")
-        if dir_path == "":
-            return True  # Root directory always exists
-
-        # Check if any file starts with this directory path
-        for file_path in self.virtual_files.keys():
-            if file_path.startswith(dir_path + "/"):
-                return True
-        return False
+        return self.virtual_files.has_dir(dir_path)
 
     def _handle_time_command(self, command_line: str, cmd_def: Dict[str, Any]) -> str:
         """Handle the time command - either set time or query current time."""
@@ -443,18 +766,21 @@ class MockCNCServer:
         if not self._file_exists(file_path):
             return f"ERROR: File not found: {file_path}"
 
-        file_info = self.virtual_files[file_path]
-        contents = file_info["contents"]
+        contents = _file_text(self.virtual_files[file_path])
 
         # Handle optional line limit
         if len(parts) >= 3:
             try:
                 limit = int(parts[2])
-                lines = contents.split("\n")
-                if limit > 0 and limit < len(lines):
-                    contents = "\n".join(lines[:limit])
             except ValueError:
-                pass  # Ignore invalid limit, show full file
+                limit = 0  # Ignore invalid limit, show full file
+
+            # Split off just the requested lines and cut at the last of them,
+            # instead of splitting every line of the file and re-joining
+            if limit > 0:
+                head = contents.split("\n", limit)
+                if len(head) > limit:
+                    contents = contents[: len(contents) - len(head[-1]) - 1]
 
         return contents
 
@@ -549,44 +875,53 @@ class MockCNCServer:
         loop = asyncio.get_running_loop()
 
         # Create blocking I/O adapters for XMODEM protocol using asyncio.run_coroutine_threadsafe
+        # A timeout can surface from wait_for (inside the loop) or from
+        # future.result (in this thread); they are distinct types before 3.11
+        timeouts = (asyncio.TimeoutError, concurrent.futures.TimeoutError)
+
         def getc(size: int, timeout: float = 1.0) -> Optional[bytes]:
             """Blocking read adapter for XMODEM protocol."""
+            # readexactly waits for the whole block even when TCP delivers it
+            # in pieces, and consumes nothing if it times out
+            future = asyncio.run_coroutine_threadsafe(
+                asyncio.wait_for(reader.readexactly(size), timeout), loop
+            )
             try:
-                # Create a future for the read operation
-                future = asyncio.run_coroutine_threadsafe(
-                    asyncio.wait_for(reader.read(size), timeout), loop
-                )
                 # Wait for the result (this blocks the thread but not the event loop)
-                data = future.result(timeout + 1.0)
-                if len(data) == size:
-                    return data
-                else:
-                    self.logger.debug(
-                        f"getc: requested {size} bytes, got {len(data)} bytes"
-                    )
-                    return None
-            except asyncio.TimeoutError:
+                return future.result(timeout + 1.0)
+            except timeouts:
+                future.cancel()
                 self.logger.debug(
                     f"getc: timeout after {timeout}s waiting for {size} bytes"
                 )
                 return None
+            except asyncio.IncompleteReadError as e:
+                self.logger.debug(
+                    f"getc: connection closed after {len(e.partial)} of {size} bytes"
+                )
+                return None
             except Exception as e:
                 self.logger.error(f"getc error: {e}")
                 return None
 
+        async def write_and_drain(data: bytes) -> None:
+            # Transports are not thread-safe, so the write itself runs on the loop
+            writer.write(data)
+            await writer.drain()
+
         def putc(data: bytes, timeout: float = 1.0) -> Optional[int]:
             """Blocking write adapter for XMODEM protocol."""
+            future = asyncio.run_coroutine_threadsafe(
+                asyncio.wait_for(write_and_drain(data), timeout), loop
+            )
             try:
-                # Create a future for the write operation
-                writer.write(data)
-                future = asyncio.run_coroutine_threadsafe(
-                    asyncio.wait_for(writer.drain(), timeout), loop
-                )
                 # Wait for the result (this blocks the thread but not the event loop)
                 future.result(timeout + 1.0)
-                self.logger.debug(f"putc: sent {len(data)} bytes")
+                # Runs for every block and ACK, so format only if DEBUG is on
+                self.logger.debug("putc: sent %d bytes", len(data))
                 return len(data)
-            except asyncio.TimeoutError:
+            except timeouts:
+                future.cancel()
                 self.logger.debug(
                     f"putc: timeout after {timeout}s sending {len(data)} bytes"
                 )
@@ -599,15 +934,25 @@ class MockCNCServer:
         self.logger.debug("Creating XMODEM protocol instance in 8K mode")
         xmodem = XMODEMProtocol(getc, putc, mode="xmodem8k")
 
-        # Run XMODEM operation in a separate thread to avoid event loop conflicts
+        # Run XMODEM operation in a separate thread to avoid event loop conflicts.
+        # A process pool is not an option: getc/putc drive this connection's
+        # StreamReader/StreamWriter, which only exist on the loop's thread
         try:
             if cmd_key == "upload":
-                result = await asyncio.to_thread(
-                    self._handle_upload_sync, xmodem, normalized_path, client_addr
+                result = await loop.run_in_executor(
+                    self._transfer_pool,
+                    self._handle_upload_sync,
+                    xmodem,
+                    normalized_path,
+                    client_addr,
                 )
             elif cmd_key == "download":
-                result = await asyncio.to_thread(
-                    self._handle_download_sync, xmodem, normalized_path, client_addr
+                result = await loop.run_in_executor(
+                    self._transfer_pool,
+                    self._handle_download_sync,
+                    xmodem,
+                    normalized_path,
+                    client_addr,
                 )
             else:
                 result = f"ERROR: Unknown XMODEM command: {cmd_key}"
@@ -624,8 +969,8 @@ class MockCNCServer:
         self.logger.info(f"Starting XMODEM upload receive for: {filepath}")
         self.logger.debug(f"Upload initiated by client: {client_addr}")
 
-        # Create in-memory stream to receive file data
-        file_stream = io.BytesIO()
+        # Create in-memory stream to receive file data, hashing as blocks land
+        file_stream = _HashingBytesIO()
 
         # Start XMODEM receive operation (blocking)
         self.logger.debug("Beginning XMODEM receive operation (blocking)")
@@ -642,12 +987,14 @@ class MockCNCServer:
             self.logger.info(f"Upload canceled - MD5 match for {filepath}")
             return "Upload canceled - file already exists with same content"
         else:
-            # Upload successful, add file to virtual filesystem
+            # Upload successful, add file to virtual filesystem. getvalue()
+            # hands over BytesIO's own buffer without copying it, unlike
+            # bytes() over a bytearray sink, which would double peak memory
             file_data = file_stream.getvalue()
             file_stream.close()
 
-            # Calculate MD5 for the uploaded file
-            md5_hash = hashlib.md5(file_data).hexdigest()
+            # MD5 was accumulated block by block during the receive
+            md5_hash = file_stream.md5.hexdigest()
             self.logger.debug(f"Calculated MD5 for uploaded file: {md5_hash}")
 
             # Add to virtual filesystem
@@ -670,9 +1017,7 @@ class MockCNCServer:
             self.logger.error(f"Download failed: file not found - {filepath}")
             return f"ERROR: File not found: {filepath}"
 
-        file_info = self.virtual_files[filepath]
-        file_data = file_info.get("contents", "").encode("utf-8")
-        md5_hash = hashlib.md5(file_data).hexdigest()
+        file_data, md5_hash = _encoded_contents(self.virtual_files[filepath])
 
         self.logger.debug(f"File found: {len(file_data)} bytes, MD5: {md5_hash}")
 
@@ -699,34 +1044,45 @@ class MockCNCServer:
 
     def _add_virtual_file(self, filepath: str, data: bytes, md5_hash: str):
         """Add a file to the virtual filesystem."""
-        # Convert bytes to string for storage (assuming text files for now)
-        try:
-            content = data.decode("utf-8")
-        except UnicodeDecodeError:
-            # For binary files, store as base64 or handle differently
-            import base64
-
-            content = base64.b64encode(data).decode("ascii")
-            # Mark as binary file
-            filepath += ".b64"
-
         # Generate current timestamp
         current_time = datetime.now()
         timestamp_str = self._format_timestamp(current_time)
 
+        # Raw bytes are stored as received (text or binary) and decoded only
+        # when cat needs them; downloads send them back unchanged
         self.virtual_files[filepath] = {
             "path": filepath,
             "size": len(data),
-            "contents": content,
+            "data": data,
             "md5": md5_hash,
             "timestamp": timestamp_str,
             "timestamp_parsed": current_time,
+            "_encoded": (data, data, md5_hash),
         }
 
         self.logger.info(
             f"Added file to virtual filesystem: {filepath} ({len(data)} bytes, timestamp: {timestamp_str})"
         )
 
+    @staticmethod
+    def _latency(cmd_def: Dict[str, Any]) -> float:
+        """Return the simulated response delay for a command, in seconds."""
+        # Minimum 100ms, or the command-specific time
+        return max(100, cmd_def.get("time_ms", 100)) / 1000.0
+
+    @staticmethod
+    def _frame_response(response: str, cmd_def: Optional[Dict[str, Any]]) -> bytes:
+        """Encode a response with its EOT and trailing 'ok' as the command needs."""
+        # Response, optional EOT and 'ok' go out as one write so they leave
+        # in a single segment
+        if cmd_def and cmd_def.get("eot_terminated", False):
+            payload = f"{response}\x04\n"
+        else:
+            payload = f"{response}\n"
+        if cmd_def and cmd_def.get("sends_ok", False):
+            payload += "ok\n"
+        return payload.encode("utf-8")
+
     def _get_response(self, cmd_def: Dict[str, Any]) -> str:
         """Get the response for a command."""
         response = cmd_def.get("response", "ok")
@@ -743,16 +1099,19 @@ class MockCNCServer:
         self.logger.info(f"Client connected from {client_addr}")
 
         # Check connection limit
-        if len(self.active_connections) >= self.max_connections:
+        if (
+            self.max_connections is not None
+            and len(self.active_connections) >= self.max_connections
+        ):
             self.logger.warning(
                 f"Rejecting connection from {client_addr} - max {self.max_connections} connections reached"
             )
             writer.write(
                 f"ERROR: Server busy, maximum {self.max_connections} connections allowed\n".encode()
             )
-            await writer.drain()
+            # close() still flushes the message before the FIN; waiting for
+            # the peer to finish the shutdown would only hold this task open
             writer.close()
-            await writer.wait_closed()
             return
 
         # Add connection to active set
@@ -760,13 +1119,37 @@ class MockCNCServer:
 
         # Initialize connection state (reset working directory)
         self._set_connection_cwd(client_addr_str, "/")
+        client_reader = _ClientReader(reader)
+
+        # Replies to pipelined commands collect here, with their log text and
+        # level, while the next command is already buffered, then leave in a
+        # single write
+        unsent: List[Tuple[bytes, str, int]] = []
+
+        def write_unsent() -> None:
+            writer.write(b"".join(payload for payload, _, _ in unsent))
+            # Log responses at the level set by their debug_output_only field
+            for _, response, trace_level in unsent:
+                if self.logger.isEnabledFor(trace_level):
+                    log_trace(
+                        self.logger,
+                        trace_level,
+                        _format_multiline_log(response, "SEND"),
+                    )
+            unsent.clear()
+
+        async def send_unsent() -> None:
+            write_unsent()
+            await writer.drain()
 
         try:
             while True:
                 # Read command from client with 10-second timeout
                 # Handle instant commands that don't wait for newline
                 try:
-                    command_line = await self._read_command_data(reader, 10.0)
+                    command_line = await self._read_command_data(
+                        client_reader, 10.0
+                    )
                 except asyncio.TimeoutError:
                     self.logger.info(
                         f"Client {client_addr} timed out after 10 seconds of inactivity"
@@ -778,17 +1161,27 @@ class MockCNCServer:
 
                 # Parse and process command first to get cmd_def
                 cmd_key, cmd_def = self._parse_command(command_line)
+                trace_level = (
+                    logging.DEBUG
+                    if cmd_def and cmd_def.get("debug_output_only", False)
+                    else logging.INFO
+                )
 
                 # Log command at appropriate level based on debug_output_only field
-                if cmd_def and cmd_def.get("debug_output_only", False):
-                    self.logger.debug(_format_multiline_log(command_line, "RECV"))
-                else:
-                    self.logger.info(_format_multiline_log(command_line, "RECV"))
+                if self.logger.isEnabledFor(trace_level):
+                    log_trace(
+                        self.logger,
+                        trace_level,
+                        _format_multiline_log(command_line, "RECV"),
+                    )
 
+                payload = None
                 if cmd_def is None or cmd_key is None:
                     # Unknown command
-                    response = "ERROR: Unknown command"
-                    self.logger.warning(f"Unknown command: {command_line}")
+                    response = _UNKNOWN_RESPONSE
+                    payload = _UNKNOWN_PAYLOAD
+                    if self.logger.isEnabledFor(logging.WARNING):
+                        self.logger.warning(f"Unknown command: {command_line}")
                 else:
                     # Handle special commands
                     if cmd_key == "time":
@@ -799,34 +1192,43 @@ class MockCNCServer:
                         )
                     elif cmd_key in ["upload", "download"]:
                         # XMODEM file transfer commands - these are blocking operations
+                        # that write to the socket themselves, after earlier replies
+                        if unsent:
+                            await send_unsent()
                         response = await self._handle_xmodem_command(
-                            command_line, cmd_key, reader, writer, client_addr_str
+                            command_line,
+                            cmd_key,
+                            client_reader,
+                            writer,
+                            client_addr_str,
                         )
                     else:
-                        # Get response for known command
+                        # Get response for known command, already encoded
                         response = self._get_response(cmd_def)
-
-                    # Add artificial delay (minimum 100ms, or command-specific time)
-                    delay_ms = max(100, cmd_def.get("time_ms", 100))
-                    await asyncio.sleep(delay_ms / 1000.0)
-
-                # Send response with optional EOT termination
-                if cmd_def and cmd_def.get("eot_terminated", False):
-                    writer.write(f"{response}\x04\n".encode("utf-8"))
-                else:
-                    writer.write(f"{response}\n".encode("utf-8"))
-
-                # Send 'ok' if required
-                if cmd_def and cmd_def.get("sends_ok", False):
-                    writer.write(b"ok\n")
-
-                await writer.drain()
-
-                # Log response at appropriate level based on debug_output_only field
-                if cmd_def and cmd_def.get("debug_output_only", False):
-                    self.logger.debug(_format_multiline_log(response, "SEND"))
-                else:
-                    self.logger.info(_format_multiline_log(response, "SEND"))
+                        payload = cmd_def.get("_payload")
+
+                    # Add artificial delay (minimum 100ms, or command-specific time).
+                    # Sleeping here rather than scheduling the write only parks
+                    # this connection's coroutine; other clients keep running,
+                    # and a real controller also finishes one command before
+                    # acting on the next.
+                    if self.simulate_latency:
+                        delay_s = cmd_def.get("_delay_s")
+                        if delay_s is None:
+                            delay_s = self._latency(cmd_def)
+                        await asyncio.sleep(delay_s)
+
+                # Send response with optional EOT termination, plus 'ok' if
+                # required. Hold it back only while a non-blank next command
+                # is already complete in the buffer, so reading it cannot wait
+                # on the client (latency simulation sends every reply on its own)
+                if payload is None:
+                    payload = self._frame_response(response, cmd_def)
+                unsent.append((payload, response, trace_level))
+                if self.simulate_latency or not _has_next_command(
+                    client_reader.pending
+                ):
+                    await send_unsent()
 
         except asyncio.CancelledError:
             self.logger.info("Connection cancelled")
@@ -838,25 +1240,65 @@ class MockCNCServer:
             # Clean up connection state
             if client_addr_str in self.connection_cwd:
                 del self.connection_cwd[client_addr_str]
+            # Whatever ended the session, replies already produced still go
+            # out; close() flushes them. A peer that has gone away just misses
+            # them
+            if unsent:
+                try:
+                    write_unsent()
+                except Exception as e:
+                    self.logger.error(f"Error sending held replies: {e}")
             writer.close()
             await writer.wait_closed()
             self.logger.info(f"Client {client_addr} disconnected")
 
     async def start(self):
         """Start the mock CNC server."""
+        # Stream defaults are deliberate: asyncio already sets TCP_NODELAY on
+        # accepted sockets, and shrinking the reader limit or write high-water
+        # mark to 4 KiB made no difference to command round trips while
+        # forcing extra pause/resume cycles around 8K XMODEM blocks
         server = await asyncio.start_server(self._handle_client, self.host, self.port)
 
         addr = server.sockets[0].getsockname()
         self.logger.info(f"Mock CNC Server started on {addr[0]}:{addr[1]}")
 
-        async with server:
-            await server.serve_forever()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            # Transfers still running end with their connections
+            self._transfer_pool.shutdown(wait=False)
+
+
+def _run_event_loop(main_coro) -> None:
+    """Run main_coro on uvloop when it is installed, else on the default loop."""
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main_coro)
+    else:
+        if hasattr(uvloop, "run"):
+            uvloop.run(main_coro)
+        else:
+            # uvloop.run() arrived in 0.18; older releases install a policy
+            uvloop.install()
+            asyncio.run(main_coro)
+
+
+def _connection_limit(value: str) -> int:
+    """Parse --max-connections, refusing negative limits."""
+    try:
+        limit = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if limit < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {limit}")
+    return limit
 
 
 def main():
     """Main CLI entry point."""
-    import argparse
-
     parser = argparse.ArgumentParser(description="Spindrift CNC Protocol Library")
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
@@ -871,6 +1313,17 @@ def main():
     server_parser.add_argument(
         "--verbose", "-v", action="store_true", help="Enable verbose logging"
     )
+    server_parser.add_argument(
+        "--max-connections",
+        type=_connection_limit,
+        default=2,
+        help="Simultaneous clients to accept, 0 for no limit (default: 2)",
+    )
+    server_parser.add_argument(
+        "--no-latency",
+        action="store_true",
+        help="Respond immediately instead of simulating per-command time_ms delays",
+    )
 
     args = parser.parse_args()
 
@@ -880,9 +1333,14 @@ def main():
         setup_logging(level=log_level)
 
         # Start mock server
-        server = MockCNCServer(host=args.host, port=args.port)
+        server = MockCNCServer(
+            host=args.host,
+            port=args.port,
+            simulate_latency=not args.no_latency,
+            max_connections=args.max_connections or None,
+        )
         try:
-            asyncio.run(server.start())
+            _run_event_loop(server.start())
         except KeyboardInterrupt:
             print("\nServer stopped by user")
     else:
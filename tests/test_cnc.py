@@ -0,0 +1,238 @@
+"""
+CNC State Parsing Tests
+
+This test suite verifies that the CNC class parses status, diagnose and
+state responses from the machine into the expected state fields.
+"""
+
+import pytest
+
+from spindrift.cnc import CNC, CNCState, Position
+
+
+@pytest.mark.parsing
+class TestStatusParsing:
+    """Test suite for status (?) response parsing."""
+
+    def test_parse_idle_status(self, fresh_cnc, sample_responses):
+        """Test that a full status response populates every field group."""
+        response = sample_responses["status_responses"]["idle"]
+
+        assert fresh_cnc.parse_status_response(response) is True
+        assert fresh_cnc.state == CNCState.INFO
+        assert fresh_cnc.machine_position.x == -1.0
+        assert fresh_cnc.work_position.x == 287.66
+        assert fresh_cnc.work_position.a == 0.0  # nan maps to 0.0
+        assert fresh_cnc.feed_info.target == 3000.0
+        assert fresh_cnc.feed_info.override == 100
+        assert fresh_cnc.spindle_info.temperature == 23.4
+        assert fresh_cnc.tool_info.current_tool == 2
+        assert fresh_cnc.laser_info.scale == 100.0
+        assert fresh_cnc.halt_reason == 1
+        assert fresh_cnc.control_states == "2,1,0,1"
+
+    def test_parse_status_with_extras(self, fresh_cnc, sample_responses):
+        """Test the optional playback, ATC and rotation fields."""
+        assert fresh_cnc.parse_status_response(
+            sample_responses["status_responses"]["with_playback"]
+        )
+        assert (fresh_cnc.played_lines, fresh_cnc.played_percent) == (150, 75)
+        assert fresh_cnc.played_seconds == 300
+
+        assert fresh_cnc.parse_status_response(
+            sample_responses["status_responses"]["with_extras"]
+        )
+        assert fresh_cnc.atc_state == 2
+        assert fresh_cnc.max_delta == 1.5
+        assert fresh_cnc.rotation_angle == 45.0
+        assert fresh_cnc.active_coord_system == 1
+
+    def test_short_fields_use_defaults(self, fresh_cnc):
+        """Test that missing trailing values fall back to defaults."""
+        assert fresh_cnc.parse_status_response("<Idle|MPos:1,2|F:5|T:3>")
+        assert fresh_cnc.machine_position.y == 2.0
+        assert fresh_cnc.machine_position.z == 0.0
+        assert fresh_cnc.feed_info.current == 5.0
+        assert fresh_cnc.feed_info.override == 100
+        assert fresh_cnc.tool_info.target_tool == -1
+
+    def test_malformed_field_is_skipped(self, fresh_cnc):
+        """Test that a bad field leaves state untouched but parsing succeeds."""
+        assert fresh_cnc.parse_status_response("<Idle|MPos:abc,def|F:1,2,3>")
+        assert fresh_cnc.machine_position.x == 0.0
+        assert fresh_cnc.feed_info.override == 3
+
+    @pytest.mark.edge_case
+    @pytest.mark.parametrize(
+        "key", ["no_brackets", "only_opening", "only_closing", "empty", "whitespace"]
+    )
+    def test_bad_framing_rejected(self, fresh_cnc, sample_responses, key):
+        """Test that responses without <...> framing are rejected."""
+        response = sample_responses["malformed_responses"][key]
+        assert fresh_cnc.parse_status_response(response) is False
+
+    def test_parse_status_bytes_matches_str(self, sample_responses):
+        """Test that raw bytes from the transport parse like the decoded str."""
+        response = sample_responses["status_responses"]["run"]
+        from_str, from_bytes = CNC(), CNC()
+
+        assert from_str.parse_status_response(response)
+        assert from_bytes.parse_status_response(response.encode("ascii"))
+        assert from_bytes.get_status_dict() == from_str.get_status_dict()
+        assert from_bytes.control_states == from_str.control_states
+
+    @pytest.mark.edge_case
+    def test_unknown_field_logged_once(self, fresh_cnc, caplog):
+        """Test that an unknown status key is skipped and only reported once."""
+        caplog.set_level("DEBUG", logger="spindrift.cnc")
+
+        assert fresh_cnc.parse_status_response("<Idle|Zq:1|W:2.5>")
+        assert fresh_cnc.parse_status_response("<Idle|Zq:3|W:4.5>")
+
+        assert fresh_cnc.workpiece_voltage == 4.5
+        assert [r.getMessage() for r in caplog.records].count(
+            "Ignoring unknown status field 'Zq'"
+        ) == 1
+
+    @pytest.mark.edge_case
+    def test_unknown_fields_tracked_per_instance(self, fresh_cnc, caplog):
+        """Test that each CNC reports unknown keys itself, up to a fixed number."""
+        caplog.set_level("DEBUG", logger="spindrift.cnc")
+        fresh_cnc.parse_status_response("<Idle|Zq:1>")
+        CNC().parse_status_response("<Idle|Zq:1>")
+
+        assert [r.getMessage() for r in caplog.records].count(
+            "Ignoring unknown status field 'Zq'"
+        ) == 2
+
+        fields = "|".join(f"U{i}:0" for i in range(200))
+        fresh_cnc.parse_status_response(f"<Idle|{fields}>")
+        assert len(fresh_cnc._unknown_status_fields) == 64
+
+
+@pytest.mark.parsing
+class TestDiagnoseParsing:
+    """Test suite for diagnose response parsing."""
+
+    def test_parse_mixed_diagnose(self, fresh_cnc, sample_responses):
+        """Test that switches, levels and sensors are populated."""
+        response = sample_responses["diagnose_responses"]["mixed"]
+
+        assert fresh_cnc.parse_diagnose_response(response) is True
+        assert fresh_cnc.switches.spindle == 1
+        assert fresh_cnc.switch_levels.spindle == 5000
+        assert fresh_cnc.switch_levels.vacuum == 50
+        assert fresh_cnc.sensors.x_max == 1
+        assert fresh_cnc.sensors.z_max == 1
+        assert fresh_cnc.sensors.atc_home == 1
+
+    def test_bad_framing_rejected(self, fresh_cnc):
+        """Test that responses without {...} framing are rejected."""
+        assert fresh_cnc.parse_diagnose_response("S:1,2}") is False
+        assert fresh_cnc.parse_diagnose_response("{S:1,2") is False
+
+
+@pytest.mark.parsing
+class TestStateParsing:
+    """Test suite for $G state response parsing."""
+
+    def test_parse_g55_state(self, fresh_cnc, sample_responses):
+        """Test that WCS, tool, feed and spindle are read from modal state."""
+        response = sample_responses["state_responses"]["g55"]
+
+        assert fresh_cnc.parse_state_response(response) is True
+        assert fresh_cnc.wcs.active_wcs == "G55"
+        assert fresh_cnc.tool_info.current_tool == 1
+        assert fresh_cnc.feed_info.target == 2000.0
+        assert fresh_cnc.spindle_info.target_rpm == 5000.0
+
+
+@pytest.mark.parsing
+class TestResponseDispatch:
+    """Test suite for parse_response type dispatch."""
+
+    def test_dispatches_on_opening_bracket(self, fresh_cnc, sample_responses):
+        """Test that each response type reaches its own parser."""
+        assert fresh_cnc.parse_response(sample_responses["status_responses"]["alarm"])
+        assert fresh_cnc.state == CNCState.ALARM
+
+        assert fresh_cnc.parse_response(
+            sample_responses["diagnose_responses"]["emergency_stop"]
+        )
+        assert fresh_cnc.sensors.e_stop == 1
+
+        assert fresh_cnc.parse_response(b" [G0 G56 T2 F1500.0 S8000.0]\r\n")
+        assert fresh_cnc.wcs.active_wcs == "G56"
+
+    @pytest.mark.edge_case
+    def test_unknown_response_rejected(self, fresh_cnc):
+        """Test that responses with no known framing are rejected."""
+        assert fresh_cnc.parse_response("ok") is False
+        assert fresh_cnc.parse_response("   ") is False
+        assert fresh_cnc.parse_response(None) is False
+
+
+@pytest.mark.data_classes
+class TestPackedPositions:
+    """Test suite for packed position buffers."""
+
+    def test_pack_unpack_round_trip(self):
+        """Test that positions survive a pack/unpack round trip."""
+        positions = [Position(1, 2, 3, 4, 5), Position(-1.5, 0, 7.25, 0, 0)]
+        buffer = Position.pack(positions)
+
+        assert buffer.typecode == "d"
+        assert len(buffer) == 10
+        assert Position.unpack(buffer) == positions
+
+    def test_rotate_packed_matches_scalar_rotation(self, cnc_assertions):
+        """Test that batch rotation rotates X/Y only, like the WCO math."""
+        buffer = Position.pack([Position(10, 0, 1, 2, 3), Position(0, 5, 0, 0, 0)])
+        Position.rotate_packed(buffer, 90.0)
+
+        first, second = Position.unpack(buffer)
+        cnc_assertions.assert_position_equal(first, Position(0, 10, 1, 2, 3))
+        cnc_assertions.assert_position_equal(second, Position(-5, 0, 0, 0, 0))
+
+
+@pytest.mark.data_classes
+class TestStatusExport:
+    """Test suite for status dictionary export."""
+
+    def test_flat_status_matches_nested(self, cnc_with_sample_data):
+        """Test that the flat export carries the same values as the nested one."""
+        nested = cnc_with_sample_data.get_status_dict()
+        flat = cnc_with_sample_data.get_status_flat()
+
+        expected = {"state": nested.pop("state")}
+        for group, values in nested.items():
+            for name, value in values.items():
+                expected[f"{group}_{name}"] = value
+
+        assert flat == expected
+        assert list(flat) == list(expected)
+        assert flat["machine_position_x"] == 10.5
+
+
+class TestTimeTracking:
+    """Test suite for CNC time tracking."""
+
+    def test_time_uninitialized(self, fresh_cnc):
+        """Test that no time is reported until set_time is called."""
+        assert fresh_cnc.is_time_initialized() is False
+        assert fresh_cnc.get_current_time() is None
+        assert fresh_cnc.get_current_datetime() is None
+
+    def test_time_advances_from_set_value(self, fresh_cnc):
+        """Test that the reported time starts at the set epoch and moves forward."""
+        assert fresh_cnc.set_time(1751357510) is True
+
+        first = fresh_cnc.get_current_time()
+        second = fresh_cnc.get_current_time()
+        assert 1751357510 <= first <= second < 1751357511
+
+    def test_out_of_range_time_rejected(self, fresh_cnc):
+        """Test that negative and post-2038 times are rejected."""
+        assert fresh_cnc.set_time(-1) is False
+        assert fresh_cnc.set_time(2147483648) is False
+        assert fresh_cnc.is_time_initialized() is False
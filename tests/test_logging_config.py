@@ -0,0 +1,219 @@
+"""
+Logging Configuration Tests
+
+This test suite verifies the Spindrift log format and the handler setup
+performed by setup_logging.
+"""
+
+import gc
+import io
+import logging
+import weakref
+
+import pytest
+
+from spindrift.logging_config import (
+    ColoredFormatter,
+    LazyStr,
+    debug_enabled,
+    log_trace,
+    setup_logging,
+)
+
+
+@pytest.fixture
+def logger_name(request):
+    """Provide a logger name unique to the test, removing its handlers after."""
+    name = f"spindrift.tests.{request.node.name}"
+    yield name
+    logger = logging.getLogger(name)
+    for handler in logger.handlers:
+        handler.close()
+    logger.handlers.clear()
+
+
+class TestColoredFormatter:
+    """Test suite for the colored record format."""
+
+    def test_format_layout(self):
+        """Test the [LEVEL] [HH:MM:SS] message layout."""
+        record = logging.LogRecord("x", logging.INFO, "f", 1, "hi %s", ("there",), None)
+        output = ColoredFormatter().format(record)
+
+        assert output.startswith("\033[32m[INFO    ]\033[0m [")
+        assert output.endswith("] hi there")
+
+    def test_custom_level_has_no_escapes(self):
+        """Test that a level without a color gets a plain, reset-free prefix."""
+        record = logging.LogRecord("x", 25, "f", 1, "note", None, None)
+        record.levelname = "NOTICE"
+
+        assert ColoredFormatter().format(record).startswith("[NOTICE  ] [")
+
+    def test_renamed_standard_level(self):
+        """Test that a level renamed with addLevelName() prints its new name."""
+        logging.addLevelName(logging.WARNING, "WARN")
+        try:
+            record = logging.LogRecord("x", logging.WARNING, "f", 1, "hi", None, None)
+        finally:
+            logging.addLevelName(logging.WARNING, "WARNING")
+
+        assert ColoredFormatter().format(record).startswith("[WARN    ] [")
+
+    def test_plain_output_for_non_tty(self, logger_name, monkeypatch):
+        """Test that a non-terminal stream gets no ANSI escapes."""
+        monkeypatch.delenv("SPINDRIFT_FORCE_COLOR", raising=False)
+        stream = io.StringIO()
+        setup_logging(logger_name=logger_name, stream=stream).warning("careful")
+
+        assert stream.getvalue().startswith("[WARNING ] [")
+        assert "\033" not in stream.getvalue()
+
+    def test_force_color_env(self, logger_name, monkeypatch):
+        """Test that SPINDRIFT_FORCE_COLOR keeps colors on a non-terminal stream."""
+        monkeypatch.setenv("SPINDRIFT_FORCE_COLOR", "1")
+        stream = io.StringIO()
+        setup_logging(logger_name=logger_name, stream=stream).warning("careful")
+
+        assert stream.getvalue().startswith("\033[33m[WARNING ]\033[0m [")
+
+
+class TestSetupLogging:
+    """Test suite for setup_logging handler management."""
+
+    def test_repeat_setup_reuses_handler(self, logger_name):
+        """Test that a second call with the same stream only changes the level."""
+        stream = io.StringIO()
+        logger = setup_logging(logger_name=logger_name, stream=stream)
+        handler = logger.handlers[0]
+
+        setup_logging(logging.DEBUG, logger_name=logger_name, stream=stream)
+
+        assert logger.handlers == [handler]
+        assert logger.level == logging.DEBUG
+
+    def test_new_stream_replaces_handler(self, logger_name):
+        """Test that switching streams leaves a single handler on the new stream."""
+        first, second = io.StringIO(), io.StringIO()
+        setup_logging(logger_name=logger_name, stream=first)
+        logger = setup_logging(logger_name=logger_name, stream=second)
+
+        logger.info("hello")
+
+        assert len(logger.handlers) == 1
+        assert first.getvalue() == ""
+        assert second.getvalue().endswith("hello\n")
+
+    def test_buffered_records_flush_on_error(self, logger_name):
+        """Test that buffered records are held until an ERROR arrives."""
+        stream = io.StringIO()
+        logger = setup_logging(
+            logger_name=logger_name, stream=stream, buffer_capacity=100
+        )
+
+        logger.info("queued")
+        assert stream.getvalue() == ""
+
+        logger.error("boom")
+        assert stream.getvalue().count("\n") == 2
+
+    def test_buffered_batch_flushes_stream_once(self, logger_name):
+        """Test that draining a batch flushes the stream once, not per record."""
+
+        class CountingStream(io.StringIO):
+            flushes = 0
+
+            def flush(self):
+                self.flushes += 1
+
+        stream = CountingStream()
+        logger = setup_logging(logger_name=logger_name, stream=stream, buffer_capacity=10)
+
+        for i in range(10):
+            logger.info("line %d", i)
+
+        assert stream.getvalue().count("\n") == 10
+        assert stream.flushes == 1
+
+    def test_background_records_written_on_close(self, logger_name):
+        """Test that records logged in the background are drained on close."""
+        stream = io.StringIO()
+        logger = setup_logging(logger_name=logger_name, stream=stream, background=True)
+
+        for i in range(50):
+            logger.info("line %d", i)
+        logger.handlers[0].close()
+
+        assert stream.getvalue().count("\n") == 50
+
+    @pytest.mark.parametrize(
+        "options",
+        [
+            {"background": True},
+            {"buffer_capacity": 10},
+            {"buffer_capacity": 10, "background": True},
+        ],
+    )
+    def test_replaced_handler_released(self, logger_name, options):
+        """Test that a replaced handler is not kept alive by its exit hook."""
+        first = io.StringIO()
+        logger = setup_logging(logger_name=logger_name, stream=first, **options)
+        logger.info("pending")
+        old = weakref.ref(logger.handlers[0])
+
+        setup_logging(logger_name=logger_name, stream=io.StringIO())
+        gc.collect()
+
+        assert old() is None
+        assert first.getvalue().endswith("pending\n")
+
+    def test_foreign_handler_left_open(self, logger_name):
+        """Test that a handler Spindrift did not create is detached, not closed."""
+
+        class ClosingHandler(logging.StreamHandler):
+            closed = False
+
+            def close(self):
+                self.closed = True
+                super().close()
+
+        foreign = ClosingHandler(io.StringIO())
+        logging.getLogger(logger_name).addHandler(foreign)
+
+        logger = setup_logging(logger_name=logger_name, stream=io.StringIO())
+
+        assert foreign not in logger.handlers
+        assert not foreign.closed
+
+
+class TestLazyLogging:
+    """Test suite for the deferred-formatting helpers."""
+
+    def test_lazy_str_only_built_when_emitted(self, logger_name):
+        """Test that LazyStr runs its callable only for records that are written."""
+        calls = []
+
+        def build():
+            calls.append(1)
+            return "expensive"
+
+        stream = io.StringIO()
+        logger = setup_logging(logging.INFO, logger_name=logger_name, stream=stream)
+
+        logger.debug("%s", LazyStr(build))
+        assert calls == [] and not debug_enabled(logger)
+
+        logger.info("%s", LazyStr(build))
+        assert calls == [1]
+        assert stream.getvalue().endswith("expensive\n")
+
+    def test_log_trace_respects_level(self, logger_name):
+        """Test that log_trace formats like logger.log and honours the level."""
+        stream = io.StringIO()
+        logger = setup_logging(logging.INFO, logger_name=logger_name, stream=stream)
+
+        log_trace(logger, logging.DEBUG, "hidden")
+        log_trace(logger, logging.INFO, "[RECV]: %s", "?")
+
+        assert stream.getvalue().count("\n") == 1
+        assert stream.getvalue().endswith("[RECV]: ?\n")
@@ -0,0 +1,433 @@
+"""
+Mock CNC Server Tests
+
+This test suite verifies command parsing and the virtual filesystem of
+the mock CNC server without opening a network connection.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import sys
+import time
+import types
+
+import pytest
+
+from spindrift.mock_server import (
+    MockCNCServer,
+    _ClientReader,
+    _connection_limit,
+    _encoded_contents,
+    _run_event_loop,
+    main,
+)
+
+
+@pytest.fixture
+def server():
+    """Provide a mock server loaded with the bundled commands and files."""
+    return MockCNCServer(port=0)
+
+
+class RecordingWriter:
+    """Minimal StreamWriter stand-in that records each write() call."""
+
+    def __init__(self):
+        self.writes = []
+
+    def get_extra_info(self, name, default=None):
+        return ("127.0.0.1", 5000) if name == "peername" else default
+
+    def write(self, data):
+        self.writes.append(bytes(data))
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+
+def run_session(server, data: bytes) -> RecordingWriter:
+    """Feed raw client bytes through the server's connection handler."""
+
+    async def session():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        writer = RecordingWriter()
+        await server._handle_client(reader, writer)
+        return writer
+
+    return asyncio.run(session())
+
+
+@pytest.mark.parsing
+class TestCommandParsing:
+    """Test suite for mapping command lines to command definitions."""
+
+    @pytest.mark.parametrize(
+        "line, key",
+        [
+            ("G0 X1", "G0"),
+            ("g1 x2", "G1"),
+            ("G38.2 Z-1", "G38.2"),
+            ("m490.1", "M490.1"),
+            ("M105", "M105"),
+            ("G1X10Y5", "G1"),
+        ],
+    )
+    def test_gcode_and_mcode_case_insensitive(self, server, line, key):
+        """Test that G/M codes match regardless of the letter's case."""
+        cmd_key, cmd_def = server._parse_command(line)
+
+        assert cmd_key == key
+        assert cmd_def is server.commands[f"{key[0].lower()}_codes"][key]
+
+    @pytest.mark.parametrize(
+        "line, key",
+        [("$J X-10 Y-5", "$J"), ("?", "?"), ("^X", "^X"), ("$#", "$#")],
+    )
+    def test_host_commands_match_prefix(self, server, line, key):
+        """Test that host commands are recognised by their prefix."""
+        cmd_key, cmd_def = server._parse_command(line)
+
+        assert cmd_key == key
+        assert cmd_def is server.commands["host_commands"][key]
+
+    def test_longest_host_prefix_wins(self, server):
+        """Test that overlapping host commands resolve to the longest key."""
+        server.commands["host_commands"] = {"$": {"response": "a"}, "$GX": {}}
+        server._build_command_tables()
+
+        assert server._parse_command("$GX1")[0] == "$GX"
+        assert server._parse_command("$G")[0] == "$"
+
+    def test_console_commands_ignore_case(self, server):
+        """Test that console commands match on the first word in any case."""
+        cmd_key, cmd_def = server._parse_command("  LS -s /sd  ")
+
+        assert cmd_key == "ls"
+        assert cmd_def is server.commands["console_commands"]["ls"]
+
+    def test_servers_do_not_share_definitions(self, server):
+        """Test that changing one server's commands leaves a new server's intact."""
+        server.commands["host_commands"]["$G"]["response"] = "changed"
+        server.virtual_files["/sd/config.txt"]["contents"] = "changed"
+
+        other = MockCNCServer(port=0)
+        assert other.commands["host_commands"]["$G"]["response"] != "changed"
+        assert other.virtual_files["/sd/config.txt"]["contents"] != "changed"
+
+    @pytest.mark.parametrize("line", ["G999", "M49", "G", "Gx", "", "foo"])
+    def test_unknown_commands(self, server, line):
+        """Test that unknown codes and words return no definition."""
+        assert server._parse_command(line) == (None, None)
+
+
+class TestVirtualFilesystem:
+    """Test suite for virtual filesystem directory queries."""
+
+    def test_listing_tracks_direct_assignment(self, server):
+        """Test that files assigned straight into virtual_files show up in ls."""
+        server.virtual_files["/sd/jobs/part.nc"] = {"path": "/sd/jobs/part.nc"}
+
+        assert "jobs/" in server._get_directory_contents("/sd")
+        assert server._get_directory_contents("/sd/jobs/") == ["part.nc"]
+        assert server._directory_exists("/sd/jobs")
+
+    def test_removing_last_file_removes_directory(self, server):
+        """Test that a directory disappears once its last file is removed."""
+        assert server._handle_rm_command(["rm", "/ud/temp/temp_file.tmp"], "c") == "ok"
+
+        assert not server._directory_exists("/ud/temp")
+        assert server._get_directory_contents("/ud") == ["logs/"]
+
+    def test_mv_updates_both_directories(self, server):
+        """Test that mv moves the entry between directory listings."""
+        server._handle_mv_command(["mv", "/sd/config.txt", "/ud/config.txt"], "c")
+
+        assert "config.txt" not in server._get_directory_contents("/sd")
+        assert "config.txt" in server._get_directory_contents("/ud")
+        assert server._get_directory_contents("/") == ["sd/", "ud/"]
+
+    def test_cached_listing_refreshed_after_change(self, server):
+        """Test that a listing already served picks up later additions."""
+        before = server._get_directory_contents("/sd")
+        server._add_virtual_file("/sd/zz_new.nc", b"G0 X0\n", "md5")
+
+        assert server._get_directory_contents("/sd") == before + ["zz_new.nc"]
+
+    def test_mkdir_creates_empty_directory(self, server):
+        """Test that mkdir makes a directory that exists before it has files."""
+        assert not server._directory_exists("/sd/new")
+        assert server._handle_mkdir_command(["mkdir", "/sd/new"], "c") == "ok"
+
+        assert server._directory_exists("/sd/new/")
+        assert server._handle_mkdir_command(["mkdir", "/sd/new"], "c").startswith(
+            "ERROR: Directory already exists"
+        )
+
+    @pytest.mark.parametrize(
+        "limit, expected",
+        [
+            ("2", "a\nb"),
+            ("3", "a\nb\n"),
+            ("4", "a\nb\n\n"),
+            ("0", "a\nb\n\n"),
+            ("x", "a\nb\n\n"),
+        ],
+    )
+    def test_cat_line_limit(self, server, limit, expected):
+        """Test that cat keeps the first N lines and ignores bad limits."""
+        server.virtual_files["/sd/lines.txt"] = {"contents": "a\nb\n\n"}
+
+        parts = ["cat", "/sd/lines.txt", limit]
+        assert server._handle_cat_command(parts, "c") == expected
+
+    def test_uploaded_bytes_kept_raw(self, server):
+        """Test that uploads download unchanged and cat decodes them as text."""
+        blob = bytes(range(256))
+        md5 = hashlib.md5(blob).hexdigest()
+        server._add_virtual_file("/sd/blob.bin", blob, md5)
+        server._add_virtual_file("/sd/job.nc", b"G0 X0\nG1 X1\n", "md5")
+
+        assert _encoded_contents(server.virtual_files["/sd/blob.bin"]) == (blob, md5)
+        assert server._handle_cat_command(["cat", "/sd/job.nc", "1"], "c") == "G0 X0"
+
+    def test_encoded_contents_cached_until_replaced(self, server):
+        """Test that download bytes are reused until the contents change."""
+        file_info = server.virtual_files["/sd/config.txt"]
+        data, md5 = _encoded_contents(file_info)
+
+        assert _encoded_contents(file_info)[0] is data
+        assert md5 == hashlib.md5(file_info["contents"].encode("utf-8")).hexdigest()
+
+        file_info["contents"] = "replaced"
+        assert _encoded_contents(file_info) == (
+            b"replaced",
+            hashlib.md5(b"replaced").hexdigest(),
+        )
+
+
+class TestTimeCommand:
+    """Test suite for setting and querying the server clock."""
+
+    def test_set_time(self, server):
+        """Test that a valid epoch sets the clock the query reports from."""
+        assert server._handle_time_command("time = 1751357510", {}) == ""
+        assert server._handle_time_command("time", {}) == "1751357510"
+
+    @pytest.mark.edge_case
+    @pytest.mark.parametrize(
+        "line, error",
+        [
+            ("time = -1", "ERROR: Invalid time value"),
+            ("time = 2147483648", "ERROR: Invalid time value"),
+            ("time = nan", "ERROR: Invalid time value"),
+            ("time = soon", "ERROR: Invalid time format"),
+        ],
+    )
+    def test_invalid_time_rejected(self, server, line, error):
+        """Test that out-of-range and non-numeric times leave the clock unset."""
+        assert server._handle_time_command(line, {}) == error
+        assert server._get_current_time() is None
+
+
+@pytest.mark.communication
+class TestClientSession:
+    """Test suite for the request/response loop of a client connection."""
+
+    def test_no_latency_responds_immediately(self):
+        """Test that disabling simulated latency skips the per-command delay."""
+        server = MockCNCServer(port=0, simulate_latency=False)
+
+        started = time.monotonic()
+        writer = run_session(server, b"$H\n$J X1\nversion\n")
+
+        assert time.monotonic() - started < 0.1
+        assert b"".join(writer.writes).endswith(b"\nversion = 1.0.3c1.0.6\n")
+
+    def test_response_and_ok_sent_together(self):
+        """Test that a sends_ok response and its ok go out in one write."""
+        writer = run_session(MockCNCServer(port=0, simulate_latency=False), b"$G\n")
+
+        assert writer.writes == [
+            b"[G0 G54 G17 G21 G90 G94 M0 M5 M9 T0 F3000.0000 S1.0000]\nok\n"
+        ]
+
+    def test_unknown_command_reply(self):
+        """Test that an unrecognised line is answered with an error and no delay."""
+        started = time.monotonic()
+        writer = run_session(MockCNCServer(port=0), b"bogus\n")
+
+        assert time.monotonic() - started < 0.1
+        assert writer.writes == [b"ERROR: Unknown command\n"]
+
+    def test_commands_sharing_a_segment(self):
+        """Test that an instant command and a line in one read both get answered."""
+        server = MockCNCServer(port=0, simulate_latency=False)
+        host_commands = server.commands["host_commands"]
+        writer = run_session(server, b"?$G\n$I")
+
+        assert b"".join(writer.writes) == b"".join(
+            host_commands[key]["_payload"] for key in ("?", "$G", "$I")
+        )
+
+    @pytest.mark.parametrize(
+        "data, replies",
+        [
+            (b"$G\n" * 5, 5),
+            (b"$G\r\n", 1),
+            (b"$G\n\n", 1),
+            (b"$G\n  \n$I\n", 1),
+            ("$G\n$G\n\u00a0\n".encode(), 2),
+        ],
+    )
+    def test_pipelined_replies_share_a_write(self, data, replies):
+        """Test that buffered replies go out together and none are left unsent."""
+        server = MockCNCServer(port=0, simulate_latency=False)
+        writer = run_session(server, data)
+
+        assert writer.writes == [
+            server.commands["host_commands"]["$G"]["_payload"] * replies
+        ]
+
+    def test_reset_peer_releases_connection_slot(self):
+        """Test that failing to send held replies still frees the connection."""
+
+        class ResetWriter(RecordingWriter):
+            def write(self, data):
+                raise ConnectionResetError("peer reset")
+
+        server = MockCNCServer(port=0, simulate_latency=False)
+
+        async def session():
+            reader = asyncio.StreamReader()
+            reader.feed_data("$G\n$G\n\u00a0\n".encode())
+            reader.feed_eof()
+            await server._handle_client(reader, ResetWriter())
+
+        asyncio.run(session())
+        assert not server.active_connections
+        assert not server.connection_cwd
+
+    def test_latency_sends_each_reply_separately(self):
+        """Test that simulated latency never holds a reply behind the next delay."""
+        server = MockCNCServer(port=0)
+        for cmd_def in server.commands["host_commands"].values():
+            cmd_def["_delay_s"] = 0
+
+        assert len(run_session(server, b"$G\n" * 3).writes) == 3
+
+    @pytest.mark.parametrize("data, command", [(b"\x1c?", "?"), (b"\x1f$I", "$I")])
+    def test_instant_command_after_ascii_separator(self, server, data, command):
+        """Test that separators str.strip() removes do not hide instant commands."""
+
+        async def read_without_newline():
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            return await server._read_command_data(_ClientReader(reader), 1.0)
+
+        assert asyncio.run(read_without_newline()) == command
+
+    def test_bytes_after_command_left_for_xmodem(self, server):
+        """Test that data read past a command is what readexactly returns next."""
+
+        async def read_command_then_block():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b"download /sd/config.txt\nC")
+            client_reader = _ClientReader(reader)
+            line = await server._read_command_data(client_reader, 1.0)
+            reader.feed_data(b"AB")
+            return line, await client_reader.readexactly(3)
+
+        assert asyncio.run(read_command_then_block()) == (
+            "download /sd/config.txt",
+            b"CAB",
+        )
+
+    @pytest.mark.parametrize("limit", [0, -1])
+    def test_invalid_connection_limit_rejected(self, limit):
+        """Test that a limit below one is refused instead of failing later."""
+        with pytest.raises(ValueError, match="max_connections"):
+            MockCNCServer(port=0, max_connections=limit)
+
+    @pytest.mark.parametrize("value, limit", [("0", 0), ("5", 5)])
+    def test_cli_connection_limit_parsed(self, value, limit):
+        """Test that --max-connections accepts zero and positive counts."""
+        assert _connection_limit(value) == limit
+
+    @pytest.mark.parametrize(
+        "value, message", [("-1", "must be 0 or more"), ("x", "invalid int value")]
+    )
+    def test_cli_connection_limit_refuses_bad_values(self, value, message):
+        """Test that --max-connections parsing refuses negative and non-numbers."""
+        with pytest.raises(argparse.ArgumentTypeError, match=message):
+            _connection_limit(value)
+
+    def test_negative_cli_connection_limit_rejected(self, monkeypatch, capsys):
+        """Test that --max-connections refuses negative values at parse time."""
+        monkeypatch.setattr(
+            "sys.argv", ["spindrift", "mock-server", "--max-connections", "-1"]
+        )
+        with pytest.raises(SystemExit):
+            main()
+
+        assert "must be 0 or more" in capsys.readouterr().err
+
+    def test_stopping_server_shuts_down_transfer_pool(self):
+        """Test that the XMODEM thread pool is released when start() ends."""
+        server = MockCNCServer(host="127.0.0.1", port=0)
+
+        async def start_then_stop():
+            task = asyncio.create_task(server.start())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(start_then_stop())
+        with pytest.raises(RuntimeError):
+            server._transfer_pool.submit(print)
+
+    @pytest.mark.parametrize("limit, busy", [(2, 1), (None, 0)])
+    def test_connection_limit(self, limit, busy):
+        """Test that clients past max_connections are rejected unless unlimited."""
+        server = MockCNCServer(port=0, simulate_latency=False, max_connections=limit)
+
+        async def three_clients():
+            readers = [asyncio.StreamReader() for _ in range(3)]
+            writers = [RecordingWriter() for _ in range(3)]
+            tasks = [
+                asyncio.create_task(server._handle_client(reader, writer))
+                for reader, writer in zip(readers, writers)
+            ]
+            await asyncio.sleep(0.01)  # all three are now connected
+            for reader in readers:
+                reader.feed_eof()
+            await asyncio.gather(*tasks)
+            return writers
+
+        writers = asyncio.run(three_clients())
+        rejected = [w for w in writers if w.writes and b"Server busy" in w.writes[0]]
+        assert len(rejected) == busy
+
+    def test_old_uvloop_installed_as_policy(self, monkeypatch):
+        """Test that a uvloop without run() (before 0.18) is installed instead."""
+        installed = []
+        fake_uvloop = types.SimpleNamespace(install=lambda: installed.append(True))
+        monkeypatch.setitem(sys.modules, "uvloop", fake_uvloop)
+        results = []
+
+        async def main_coro():
+            results.append("ran")
+
+        _run_event_loop(main_coro())
+
+        assert installed == [True]
+        assert results == ["ran"]
@@ -125,12 +125,13 @@ class TestXMODEMIntegration:
         # Add binary file to virtual filesystem
         self.server._add_virtual_file("/test/binary_file.bin", binary_data, md5_hash)
         
-        # Verify file was added with .b64 extension for binary
-        binary_filename = "/test/binary_file.bin.b64"
+        # Verify file was added under its own name with the raw bytes
+        binary_filename = "/test/binary_file.bin"
         assert binary_filename in self.server.virtual_files
         file_info = self.server.virtual_files[binary_filename]
         assert file_info['size'] == len(binary_data)
         assert file_info['md5'] == md5_hash
+        assert file_info['data'] == binary_data
 
     def test_path_normalization(self):
         """Test path normalization for different client addresses."""
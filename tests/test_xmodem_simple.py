@@ -7,6 +7,7 @@ to verify compatibility with reference implementation.
 
 import io
 import hashlib
+import random
 from spindrift.xmodem import XMODEMProtocol, SOH, STX, EOT, ACK, NAK, CAN, CRC
 
 
@@ -28,6 +29,32 @@ def test_crc_calculation():
     print("✅ CRC calculation tests passed")
 
 
+def test_crc_matches_table_implementation():
+    """Test CRC calculation against a table-driven loop on a random 8K block."""
+    def dummy_getc(size, timeout=1.0):
+        return b'test'[:size] if size <= 4 else None
+
+    def dummy_putc(data, timeout=1.0):
+        return len(data)
+
+    xmodem = XMODEMProtocol(dummy_getc, dummy_putc)
+
+    rng = random.Random(8192)
+    block = bytes(rng.getrandbits(8) for _ in range(8192))
+    expected = 0x1234
+    for char in block:
+        crctbl_idx = ((expected >> 8) ^ char) & 0xff
+        expected = ((expected << 8) ^ xmodem.crctable[crctbl_idx]) & 0xffff
+
+    assert xmodem.calc_crc(block, 0x1234) == expected
+    assert xmodem.calc_crc(bytearray(block), 0x1234) == expected
+    assert xmodem.calc_crc(memoryview(block), 0x1234) == expected
+    # Any iterable of byte values is accepted, as with the table loop
+    assert xmodem.calc_crc(list(block), 0x1234) == expected
+
+    print("✅ CRC table comparison tests passed")
+
+
 def test_checksum_calculation():
     """Test simple checksum calculation."""
     def dummy_getc(size, timeout=1.0):
@@ -151,6 +178,33 @@ def test_send_handshake_simulation():
     print("✅ Send handshake simulation tests passed")
 
 
+def test_send_packet_layout():
+    """Test that full and short 8K blocks carry the right prefix, padding and CRC."""
+    sent_data = []
+
+    def mock_getc(size, timeout=1.0):
+        return CRC if not sent_data else ACK
+
+    def mock_putc(data, timeout=1.0):
+        sent_data.append(data)
+        return len(data)
+
+    xmodem = XMODEMProtocol(mock_getc, mock_putc, mode='xmodem8k')
+    test_data = bytes(range(256)) * 32 + b'tail'
+    md5_hash = hashlib.md5(test_data).hexdigest()
+
+    assert xmodem.send_file(io.BytesIO(test_data), md5_hash, timeout=1) is True
+
+    chunks = [md5_hash.encode(), test_data[:8192], b'tail']
+    assert len(sent_data) == len(chunks) + 1
+    for sequence, (packet, chunk) in enumerate(zip(sent_data, chunks)):
+        body = len(chunk).to_bytes(2, 'big') + chunk.ljust(8192, b'\x1a')
+        crc = xmodem.calc_crc(body)
+        assert packet == bytes([2, sequence, 0xFF - sequence]) + body + crc.to_bytes(2, 'big')
+
+    print("✅ Send packet layout tests passed")
+
+
 def test_receive_checksum_verification():
     """Test receive checksum verification."""
     def dummy_getc(size, timeout=1.0):
@@ -224,6 +278,7 @@ def run_all_tests():
     test_protocol_constants()
     test_crc_table_structure()
     test_crc_calculation()
+    test_crc_matches_table_implementation()
     test_checksum_calculation()
     test_md5_calculation()
     test_packet_header_construction()